@@ -0,0 +1,358 @@
+from typing import Dict, List, Any, Optional, Iterable, Callable, Protocol, Tuple
+from definitions.coding_manuals import system_manual
+from src.prompts import topic_prompts, expert_messages, completion_params
+from src.journal import EntryJournal
+import hashlib
+import shutil
+import time
+import json
+import os
+
+topics = list(system_manual.keys())
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Limits of one Batch API input file
+MAX_REQUESTS_PER_FILE = 50_000
+MAX_BYTES_PER_FILE = 190 * 2**20
+
+terminal_statuses = {'completed', 'failed', 'expired', 'cancelled'}
+
+
+def make_custom_id(run_id: str, subject_code: str, run_index: int, topic: str) -> str:
+    """
+    Args:
+        run_id: Run folder name.
+        subject_code: Subject code of the entry.
+        run_index: Sampling repetition.
+        topic: Attribution topic.
+    Returns:
+        Deterministic custom_id of the request, 'run_id|subject_code|run_index|topic'.
+    """
+    return f"{run_id}|{subject_code}|{run_index}|{topic}"
+
+
+def parse_custom_id(custom_id: str) -> Tuple[str, str, int, str]:
+    """
+    Args:
+        custom_id: custom_id built by make_custom_id.
+    Returns:
+        Tuple of run_id, subject_code, run_index and topic.
+    """
+    run_id, subject_code, run_index, topic = custom_id.rsplit("|", 3)
+    return run_id, subject_code, int(run_index), topic
+
+
+def build_batch_requests(
+    human_coding_with_transcript: Iterable[Dict[str, Any]],
+    run_id: str,
+    model_name: str,
+    temp: float | None,
+    runs: int = 3,
+    folder: str = "ai_json_output"
+) -> List[Dict[str, Any]]:
+    """
+    Build the Batch API requests of the experts approach for every subject x run x topic.
+    Subjects whose output file already exists are left out, as are calls already in a subject's journal.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        run_id: Output run folder name
+        model_name: Model to call
+        temp: Sampling temperature
+        runs: Sampling repetitions (default: 3)
+        folder: Root output folder (default: 'ai_json_output')
+    Returns:
+        List of batch request lines with the same bodies process_entry would send
+    """
+    requests: List[Dict[str, Any]] = []
+    for entry in human_coding_with_transcript:
+        subject_code = entry['subject_code']
+        if os.path.exists(os.path.join(folder, run_id, f"{subject_code}.json")):
+            continue
+        journal = EntryJournal(run_id, subject_code, folder)
+        for run_index in range(runs):
+            for topic in topics:
+                if journal.get(run_index, topic) is not None:
+                    continue
+                messages = expert_messages(topic, entry['transcript'])
+                requests.append({
+                    "custom_id": make_custom_id(run_id, subject_code, run_index, topic),
+                    "method": "POST",
+                    "url": BATCH_ENDPOINT,
+                    "body": completion_params(model_name, messages, topic_prompts[topic].response_format, temp),
+                })
+    return requests
+
+
+def write_batch_files(
+    requests: List[Dict[str, Any]],
+    batch_folder: str,
+    max_requests: int = MAX_REQUESTS_PER_FILE,
+    max_bytes: int = MAX_BYTES_PER_FILE
+) -> List[str]:
+    """
+    Write batch requests to JSONL input files, split to stay within the per-file limits.
+    Args:
+        requests: Batch request lines
+        batch_folder: Folder for the input files
+        max_requests: Maximum requests per file (default: 50,000)
+        max_bytes: Maximum bytes per file (default: 190 MiB)
+    Returns:
+        Paths of the written files
+    """
+    os.makedirs(batch_folder, exist_ok=True)
+    paths: List[str] = []
+    lines: List[str] = []
+    size = 0
+
+    def flush() -> None:
+        path = os.path.join(batch_folder, f"input_{len(paths):03d}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        paths.append(path)
+
+    for request in requests:
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        line_size = len(line.encode("utf-8"))
+        if lines and (len(lines) >= max_requests or size + line_size > max_bytes):
+            flush()
+            lines, size = [], 0
+        lines.append(line)
+        size += line_size
+    if lines:
+        flush()
+    return paths
+
+
+class BatchBackend(Protocol):
+    """
+    Endpoint that runs batch input files.
+    """
+
+    def submit(self, input_path: str) -> str:
+        """Submit an input file and return the batch id."""
+        ...
+
+    def status(self, batch_id: str) -> str:
+        """Return the batch status, e.g. 'in_progress' or one of terminal_statuses."""
+        ...
+
+    def download(self, batch_id: str, output_path: str) -> Optional[str]:
+        """Write the output file of a finished batch and return its path, or None if there is none."""
+        ...
+
+
+class OpenAIBatchBackend:
+    """
+    Batch backend on the OpenAI Batch API.
+    """
+
+    def __init__(self, client: Any, completion_window: str = "24h") -> None:
+        """
+        Args:
+            client: Synchronous OpenAI client
+            completion_window: Completion window of the batches (default: '24h')
+        """
+        self.client = client
+        self.completion_window: str = completion_window
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+            metadata={"input": os.path.basename(input_path)},
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def download(self, batch_id: str, output_path: str) -> Optional[str]:
+        batch = self.client.batches.retrieve(batch_id)
+        lines = ""
+        # Requests that failed are reported in a separate error file in the same line format
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines += text if text.endswith("\n") else text + "\n"
+        if not lines:
+            return None
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(lines)
+        return output_path
+
+
+class LocalBatchBackend:
+    """
+    Directory-based stand-in for the Batch API. Each submitted batch gets a folder <root>/<batch_id>/ with
+    input.jsonl; the batch is completed once output.jsonl appears there. If a responder is given, the
+    output is produced on submit by calling it with each request body, otherwise any other process
+    can write it.
+    """
+
+    def __init__(self, root: str, responder: Optional[Callable[[Dict[str, Any]], str]] = None) -> None:
+        """
+        Args:
+            root: Folder holding the batch folders
+            responder: Function returning the message content for a request body (default: None)
+        """
+        self.root: str = root
+        self.responder = responder
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            batch_id = "batch_" + hashlib.sha256(f.read()).hexdigest()[:16]
+        batch_folder = os.path.join(self.root, batch_id)
+        os.makedirs(batch_folder, exist_ok=True)
+        shutil.copyfile(input_path, os.path.join(batch_folder, "input.jsonl"))
+        if self.responder is not None:
+            self.respond(batch_id, self.responder)
+        return batch_id
+
+    def respond(self, batch_id: str, responder: Callable[[Dict[str, Any]], str]) -> None:
+        """
+        Produce the output file of a batch in the Batch API output format.
+        Args:
+            batch_id: Batch id returned by submit
+            responder: Function returning the message content for a request body
+        """
+        batch_folder = os.path.join(self.root, batch_id)
+        output_lines: List[str] = []
+        with open(os.path.join(batch_folder, "input.jsonl"), "r", encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                request = json.loads(line)
+                try:
+                    body = {
+                        "id": f"chatcmpl-{batch_id}-{index}",
+                        "object": "chat.completion",
+                        "model": request["body"]["model"],
+                        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": responder(request["body"])}}],
+                    }
+                    result = {"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+                except Exception as e:
+                    result = {"custom_id": request["custom_id"], "response": None, "error": {"code": type(e).__name__, "message": str(e)}}
+                output_lines.append(json.dumps(result, ensure_ascii=False) + "\n")
+        tmp_path = os.path.join(batch_folder, "output.jsonl.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(output_lines)
+        os.replace(tmp_path, os.path.join(batch_folder, "output.jsonl"))
+
+    def status(self, batch_id: str) -> str:
+        return 'completed' if os.path.exists(os.path.join(self.root, batch_id, "output.jsonl")) else 'in_progress'
+
+    def download(self, batch_id: str, output_path: str) -> Optional[str]:
+        source = os.path.join(self.root, batch_id, "output.jsonl")
+        if not os.path.exists(source):
+            return None
+        shutil.copyfile(source, output_path)
+        return output_path
+
+
+def ingest_batch_results(
+    output_paths: Iterable[str],
+    runs: int = 3,
+    folder: str = "ai_json_output"
+) -> Dict[str, Any]:
+    """
+    Ingest batch output files into the ai_json_output/<run_id>/<subject_code>.json layout.
+    Successful results are first appended to the subject's journal; subjects with every run x topic
+    result are then compacted into their per-subject file, in run and topic order, exactly as process_entry
+    writes it. Incomplete subjects keep their journal, so a later batch or process_entry only issues the
+    missing calls.
+    Args:
+        output_paths: Batch output files
+        runs: Sampling repetitions of the run (default: 3)
+        folder: Root output folder (default: 'ai_json_output')
+    Returns:
+        Dictionary with the written subject files, the incomplete subjects and the custom_ids of failed requests
+    """
+    journals: Dict[Tuple[str, str], EntryJournal] = {}
+    failed: List[str] = []
+    for output_path in output_paths:
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                result = json.loads(line)
+                custom_id = result["custom_id"]
+                response = result.get("response") or {}
+                if result.get("error") or response.get("status_code") != 200:
+                    failed.append(custom_id)
+                    continue
+                run_id, subject_code, run_index, topic = parse_custom_id(custom_id)
+                if (run_id, subject_code) not in journals:
+                    journals[(run_id, subject_code)] = EntryJournal(run_id, subject_code, folder)
+                journal = journals[(run_id, subject_code)]
+                if journal.get(run_index, topic) is None:
+                    journal.append(run_index, topic, 0, 'result', response["body"]["choices"][0]["message"]["content"])
+
+    written: List[str] = []
+    incomplete: List[str] = []
+    for (run_id, subject_code), journal in journals.items():
+        contents = [[journal.get(run_index, topic) for topic in topics] for run_index in range(runs)]
+        if any(content is None for run in contents for content in run):
+            incomplete.append(subject_code)
+            continue
+        compiled: List[Dict[str, Any]] = []
+        for run in contents:
+            this_run: Dict[str, Any] = {}
+            [this_run.update(json.loads(content)) for content in run]
+            compiled.append(this_run)
+        file_path = os.path.join(folder, run_id, f"{subject_code}.json")
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(compiled, f, indent=2, ensure_ascii=False)
+        journal.discard()
+        written.append(file_path)
+    return {"written": written, "incomplete": incomplete, "failed": failed}
+
+
+def run_batch(
+    human_coding_with_transcript: Iterable[Dict[str, Any]],
+    run_id: str,
+    model_name: str,
+    temp: float | None,
+    backend: BatchBackend,
+    runs: int = 3,
+    poll_interval: float = 60,
+    folder: str = "ai_json_output"
+) -> Dict[str, Any]:
+    """
+    Run the experts approach for a corpus through a batch backend: build and write the input files,
+    submit them, wait for the batches to finish and ingest the results.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        run_id: Output run folder name
+        model_name: Model to call
+        temp: Sampling temperature
+        backend: Batch backend, e.g. OpenAIBatchBackend(client) or LocalBatchBackend(root)
+        runs: Sampling repetitions (default: 3)
+        poll_interval: Seconds between status checks (default: 60)
+        folder: Root output folder (default: 'ai_json_output')
+    Returns:
+        Dictionary with the batch ids and their final statuses, plus the result of ingest_batch_results
+    """
+    batch_folder = os.path.join(folder, run_id, "batch")
+    requests = build_batch_requests(human_coding_with_transcript, run_id, model_name, temp, runs, folder)
+    input_paths = write_batch_files(requests, batch_folder)
+    batch_ids = [backend.submit(path) for path in input_paths]
+
+    statuses: Dict[str, str] = {}
+    while len(statuses) < len(batch_ids):
+        for batch_id in batch_ids:
+            if batch_id not in statuses:
+                status = backend.status(batch_id)
+                if status in terminal_statuses:
+                    statuses[batch_id] = status
+        if len(statuses) < len(batch_ids):
+            time.sleep(poll_interval)
+
+    output_paths = []
+    for batch_id in batch_ids:
+        output_path = backend.download(batch_id, os.path.join(batch_folder, f"output_{batch_id}.jsonl"))
+        if output_path is not None:
+            output_paths.append(output_path)
+    return {
+        "requests": len(requests),
+        "batches": statuses,
+        **ingest_batch_results(output_paths, runs, folder),
+    }
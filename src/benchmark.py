@@ -0,0 +1,198 @@
+from typing import Dict, List, Any, Callable
+from src.synthetic import generate_corpus, write_corpus
+from src.corpus import HumanCodingCorpus
+from src.utils import (
+    categories, matrix, matrix_sweep, merge_multiple_ai_runs, comparison_mode,
+    calculate_f1_scores_from_path, calculate_f1_scores_from_path_parallel, calculate_f1_scores_sweep
+)
+import argparse
+import tempfile
+import tracemalloc
+import platform
+import time
+import json
+import os
+
+thresholds = [95, 90, 85, 80, 75, 70, 65, 60, 55, 50]
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    items: int,
+    size: Dict[str, int],
+    memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Time a benchmark function and optionally measure its peak Python memory in a second pass.
+    Args:
+        name: Benchmark name
+        fn: Function to run
+        items: Number of work items the function processes, for throughput
+        size: Corpus size parameters, recorded with the result
+        memory: If True, run again under tracemalloc to record peak memory (default: True)
+    Returns:
+        Dictionary with wall time, peak memory in MB and throughput in items per second
+    """
+    start = time.perf_counter()
+    fn()
+    wall = time.perf_counter() - start
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        fn()
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        tracemalloc.stop()
+
+    result = {
+        "name": name,
+        **size,
+        "wall_s": round(wall, 4),
+        "peak_mb": peak_mb,
+        "items": items,
+        "items_per_s": round(items / wall, 1) if wall > 0 else None,
+    }
+    print(f"{name:<40} {result['wall_s']:>9}s {str(peak_mb):>9}MB {str(result['items_per_s']):>12}/s")
+    return result
+
+
+def run_benchmarks(
+    subject_counts: List[int],
+    quotes_per_label: int = 3,
+    runs: int = 3,
+    sentences_per_transcript: int = 120,
+    methods: List[str] = ['exhaustive', 'span_cover'],
+    workers: int | None = None,
+    memory: bool = True,
+    seed: int = 42
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark the evaluation hot paths on synthetic corpora of increasing size.
+    Args:
+        subject_counts: Corpus sizes (number of subjects) to benchmark
+        quotes_per_label: Average quotes per label (default: 3)
+        runs: AI runs per subject (default: 3)
+        sentences_per_transcript: Sentences per transcript (default: 120)
+        methods: Matching methods to benchmark (default: ['exhaustive', 'span_cover'])
+        workers: Worker processes for the parallel evaluation (default: None, one per CPU)
+        memory: If True, record peak memory (default: True)
+        seed: Random seed of the generator (default: 42)
+    Returns:
+        List of benchmark results
+    """
+    results: List[Dict[str, Any]] = []
+    for n_subjects in subject_counts:
+        size = {"subjects": n_subjects, "quotes_per_label": quotes_per_label, "runs": runs}
+        corpus = generate_corpus(n_subjects, sentences_per_transcript, quotes_per_label, runs, seed)
+        human = HumanCodingCorpus(corpus["human_coding"])
+        ai_runs = list(corpus["ai_outputs"].values())
+
+        # In-memory hot paths
+        results.append(measure("merge_multiple_ai_runs[pairwise]", lambda: [merge_multiple_ai_runs(r) for r in ai_runs], len(ai_runs), size, memory))
+        results.append(measure("merge_multiple_ai_runs[indexed]", lambda: [merge_multiple_ai_runs(r, engine='indexed') for r in ai_runs], len(ai_runs), size, memory))
+        merged = [merge_multiple_ai_runs(r) for r in ai_runs]
+        results.append(measure("comparison_mode", lambda: [comparison_mode(m) for m in merged], len(merged), size, memory))
+
+        pairs = []
+        for entry, m in zip(human, merged):
+            ai_entry = comparison_mode(m)
+            pairs += [(entry['Human_'+acat], ai_entry['AI_'+acat]) for acat in categories]
+        reference = [matrix(gt, inf, 50, 'exhaustive') for gt, inf in pairs]
+        for method in methods:
+            if method != 'exhaustive':
+                # span_cover approximates the exhaustive search; record how often its confusion matrices differ
+                differing = sum(matrix(gt, inf, 50, method) != expected for (gt, inf), expected in zip(pairs, reference))
+                results.append({"name": f"matrix_differs_from_exhaustive[{method}]", **size, "pairs": len(pairs), "differing": differing})
+                print(f"{'matrix_differs_from_exhaustive[' + method + ']':<40} {differing}/{len(pairs)} pairs")
+            for backend in ['compat', 'fast']:
+                results.append(measure(f"matrix[{method},{backend}]", lambda: [matrix(gt, inf, 50, method, backend=backend) for gt, inf in pairs], len(pairs), size, memory))
+            results.append(measure(f"matrix_sweep[{method}]", lambda: [matrix_sweep(gt, inf, thresholds, method) for gt, inf in pairs], len(pairs) * len(thresholds), size, memory))
+
+        # End-to-end evaluation from disk
+        with tempfile.TemporaryDirectory() as root:
+            paths = write_corpus(corpus, root)
+            path = paths["ai_output_path"]
+            for method in methods:
+                results.append(measure(f"calculate_f1_scores_from_path[{method}]", lambda: calculate_f1_scores_from_path(human, path, 50, method), n_subjects, size, memory))
+                # tracemalloc does not see worker processes, so no memory figure here
+                results.append(measure(f"calculate_f1_scores_from_path_parallel[{method}]", lambda: calculate_f1_scores_from_path_parallel(human, path, 50, method, max_workers=workers, chunksize=4), n_subjects, size, False))
+                results.append(measure(f"calculate_f1_scores_sweep[{method}]", lambda: calculate_f1_scores_sweep(human, path, thresholds, method), n_subjects * len(thresholds), size, memory))
+    return results
+
+
+def compare_to_baseline(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Compare timed benchmark steps with those of an earlier run.
+    Steps are matched by name and corpus size; steps without a wall time or missing from either run are skipped.
+    Args:
+        results: Results of run_benchmarks
+        baseline: Results of an earlier run, e.g. the 'results' of a previous bench_output.json
+    Returns:
+        List of dictionaries with the step, its wall times and its slowdown ratio (current / baseline wall time;
+        above 1 is slower)
+    """
+    def step(result: Dict[str, Any]) -> tuple:
+        return (result["name"], result.get("subjects"), result.get("quotes_per_label"), result.get("runs"))
+
+    baseline_wall = {step(result): result["wall_s"] for result in baseline if result.get("wall_s")}
+    comparison = []
+    for result in results:
+        if not result.get("wall_s") or step(result) not in baseline_wall:
+            continue
+        ratio = round(result["wall_s"] / baseline_wall[step(result)], 3)
+        comparison.append({
+            "name": result["name"],
+            "subjects": result.get("subjects"),
+            "wall_s": result["wall_s"],
+            "baseline_wall_s": baseline_wall[step(result)],
+            "slowdown": ratio,
+        })
+        print(f"{result['name'] + ' @' + str(result.get('subjects')):<48} {baseline_wall[step(result)]:>9}s -> {result['wall_s']:>9}s {ratio:>8}x")
+    return comparison
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation hot paths on synthetic data.")
+    parser.add_argument("--subjects", default="10,50,200", help="Comma-separated corpus sizes")
+    parser.add_argument("--quotes-per-label", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--sentences", type=int, default=120)
+    parser.add_argument("--methods", default="exhaustive,span_cover",
+                        help="Matching methods: 'exhaustive' (exact) and/or 'span_cover' (approximate, may differ from exhaustive)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_output.json")
+    parser.add_argument("--baseline", default=None, help="Earlier bench_output.json to report slowdown ratios against")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        [int(a) for a in args.subjects.split(",")],
+        args.quotes_per_label,
+        args.runs,
+        args.sentences,
+        args.methods.split(","),
+        args.workers,
+        not args.no_memory,
+        args.seed,
+    )
+    output: Dict[str, Any] = {
+        "config": vars(args),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            output["baseline"] = {"path": args.baseline, "comparison": compare_to_baseline(results, json.load(f)["results"])}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+from typing import Dict, List, Any, Optional
+from src.utils import categories, find_human_entry, score_subject_file
+import numpy as np
+import os
+
+COUNT_FIELDS = ['TP', 'FP', 'FN']
+
+
+def f1_from_counts(counts: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Compute per-label, macro and micro F1 from confusion counts, vectorized over leading axes.
+    Uses the same definitions as utils.calculate_f1_scores, without rounding.
+    Args:
+        counts: Array of shape (..., labels, 3) holding TP, FP, FN
+    Returns:
+        Dictionary with 'per_label' of shape (..., labels) and 'macro', 'micro' of shape (...)
+    """
+    tp, fp, fn = counts[..., 0], counts[..., 1], counts[..., 2]
+    # 2TP / (2TP + FP + FN) equals the harmonic mean of precision and recall, and 0 when undefined
+    denominator = 2 * tp + fp + fn
+    per_label = np.divide(2 * tp, denominator, out=np.zeros_like(denominator, dtype=np.float64), where=denominator > 0)
+
+    total = counts.sum(axis=-2)
+    micro_denominator = 2 * total[..., 0] + total[..., 1] + total[..., 2]
+    micro = np.divide(2 * total[..., 0], micro_denominator, out=np.zeros_like(micro_denominator, dtype=np.float64), where=micro_denominator > 0)
+    return {
+        'per_label': per_label,
+        'macro': per_label.mean(axis=-1),
+        'micro': micro,
+    }
+
+
+def _interval(samples: np.ndarray, alpha: float) -> List[float]:
+    low, high = np.quantile(samples, [alpha / 2, 1 - alpha / 2])
+    return [round(float(low), 3), round(float(high), 3)]
+
+
+class ConfusionCounts:
+    """
+    Per-subject confusion counts of one run as a NumPy array of shape (subjects, labels, 3),
+    with TP, FP, FN along the last axis. Supports vectorized bootstrap confidence intervals
+    and paired run-vs-run comparisons.
+    """
+
+    def __init__(
+        self,
+        counts: np.ndarray,
+        subjects: List[str],
+        labels: Optional[List[str]] = None
+    ) -> None:
+        """
+        Args:
+            counts: Array of shape (subjects, labels, 3)
+            subjects: Subject code of each row
+            labels: Label of each column (default: utils.categories)
+        """
+        self.counts: np.ndarray = np.asarray(counts, dtype=np.float64)
+        self.subjects: List[str] = list(subjects)
+        self.labels: List[str] = list(labels or categories)
+
+    @classmethod
+    def from_confusion_list(
+        cls,
+        confusion_list: List[Dict[str, Dict[str, int]]],
+        subjects: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None
+    ) -> "ConfusionCounts":
+        """
+        Build from the per-subject confusion dicts accepted by utils.calculate_f1_scores.
+        Args:
+            confusion_list: List of confusion matrices, each mapping labels to TP/FP/FN counts
+            subjects: Subject code of each confusion matrix (default: their positions)
+            labels: Labels to keep, in order (default: utils.categories)
+        Returns:
+            ConfusionCounts instance
+        """
+        labels = list(labels or categories)
+        counts = np.array(
+            [[[confusion.get(label, {}).get(field, 0) for field in COUNT_FIELDS] for label in labels] for confusion in confusion_list],
+            dtype=np.float64
+        ).reshape(len(confusion_list), len(labels), 3)
+        return cls(counts, subjects or [str(i) for i in range(len(confusion_list))], labels)
+
+    @classmethod
+    def from_path(
+        cls,
+        human_coding_with_transcript: Any,
+        ai_output_path: str,
+        threshold: int = 50,
+        **kwargs: Any
+    ) -> "ConfusionCounts":
+        """
+        Score every subject file of a run folder, as utils.calculate_f1_scores_from_path does.
+        Args:
+            human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+            ai_output_path: Path to directory with AI output JSON files
+            threshold: Fuzzy match threshold (default: 50)
+            kwargs: Options passed to utils.score_subject_file (method, cache, backend)
+        Returns:
+            ConfusionCounts instance with subjects in sorted file name order
+        """
+        confusion_list = []
+        subjects = []
+        for oneJson in sorted(os.listdir(ai_output_path)):
+            if not oneJson.endswith('.json'):
+                continue
+            try:
+                human_entry = find_human_entry(human_coding_with_transcript, oneJson.split(".")[0])
+                confusion_list.append(score_subject_file(f"{ai_output_path}/{oneJson}", human_entry, threshold, **kwargs))
+                subjects.append(oneJson.split(".")[0])
+            except Exception as e:
+                print(f"Error processing {oneJson}: {e}")
+        return cls.from_confusion_list(confusion_list, subjects)
+
+    def subset(self, subjects: List[str]) -> "ConfusionCounts":
+        """
+        Args:
+            subjects: Subject codes to keep, in order.
+        Returns:
+            ConfusionCounts restricted to those subjects.
+        """
+        rows = {subject: i for i, subject in enumerate(self.subjects)}
+        return ConfusionCounts(self.counts[[rows[s] for s in subjects]], subjects, self.labels)
+
+    def f1(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Point estimates identical to utils.calculate_f1_scores, whose macro F1 averages the rounded per-label F1s.
+        """
+        scores = f1_from_counts(self.counts.sum(axis=0))
+        per_label_f1 = {label: round(float(f), 3) for label, f in zip(self.labels, scores['per_label'])}
+        return {
+            "per_label_f1": per_label_f1,
+            "macro_f1": round(sum(per_label_f1.values()) / len(per_label_f1), 3) if per_label_f1 else 0,
+            "micro_f1": round(float(scores['micro']), 3),
+        }
+
+    def _resample_weights(self, n_resamples: int, seed: int) -> np.ndarray:
+        # Resampling subjects with replacement is a multinomial draw of how often each subject is picked
+        n = len(self.subjects)
+        if n == 0:
+            raise ValueError("Cannot bootstrap over zero subjects")
+        rng = np.random.default_rng(seed)
+        return rng.multinomial(n, np.full(n, 1 / n), size=n_resamples).astype(np.float64)
+
+    def _resampled_f1(self, weights: np.ndarray) -> Dict[str, np.ndarray]:
+        n, n_labels = self.counts.shape[0], self.counts.shape[1]
+        aggregated = (weights @ self.counts.reshape(n, n_labels * 3)).reshape(-1, n_labels, 3)
+        return f1_from_counts(aggregated)
+
+    def bootstrap(
+        self,
+        n_resamples: int = 10_000,
+        alpha: float = 0.05,
+        seed: int = 42
+    ) -> Dict[str, Any]:
+        """
+        Percentile bootstrap confidence intervals, resampling subjects with replacement.
+        Args:
+            n_resamples: Number of bootstrap resamples (default: 10,000)
+            alpha: One minus the confidence level (default: 0.05)
+            seed: Random seed (default: 42)
+        Returns:
+            Dictionary with point estimates and [low, high] intervals for per-label, macro and micro F1
+        Raises:
+            ValueError: If there are no subjects.
+        """
+        samples = self._resampled_f1(self._resample_weights(n_resamples, seed))
+        return {
+            **self.f1(),
+            "per_label_ci": {label: _interval(samples['per_label'][:, i], alpha) for i, label in enumerate(self.labels)},
+            "macro_ci": _interval(samples['macro'], alpha),
+            "micro_ci": _interval(samples['micro'], alpha),
+        }
+
+
+def paired_bootstrap_test(
+    run_a: ConfusionCounts,
+    run_b: ConfusionCounts,
+    n_resamples: int = 10_000,
+    alpha: float = 0.05,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Paired bootstrap comparison of two runs over the subjects they share.
+    Both runs are resampled with the same subject draws, so subject difficulty cancels out.
+    Args:
+        run_a: Confusion counts of the first run
+        run_b: Confusion counts of the second run
+        n_resamples: Number of bootstrap resamples (default: 10,000)
+        alpha: One minus the confidence level (default: 0.05)
+        seed: Random seed (default: 42)
+    Returns:
+        Dictionary with, for per-label, macro and micro F1, the observed difference b - a,
+        its [low, high] interval and a two-sided bootstrap p-value
+    Raises:
+        ValueError: If the runs share no subjects.
+    """
+    subjects_b = set(run_b.subjects)
+    shared = [s for s in run_a.subjects if s in subjects_b]
+    a, b = run_a.subset(shared), run_b.subset(shared)
+    weights = a._resample_weights(n_resamples, seed)
+    samples_a, samples_b = a._resampled_f1(weights), b._resampled_f1(weights)
+    observed_a, observed_b = f1_from_counts(a.counts.sum(axis=0)), f1_from_counts(b.counts.sum(axis=0))
+
+    def compare(key: str, index: Optional[int] = None) -> Dict[str, Any]:
+        diff = samples_b[key] - samples_a[key]
+        observed = observed_b[key] - observed_a[key]
+        if index is not None:
+            diff, observed = diff[:, index], observed[index]
+        p_value = min(1.0, 2 * min(float(np.mean(diff <= 0)), float(np.mean(diff >= 0))))
+        return {"diff": round(float(observed), 3), "ci": _interval(diff, alpha), "p_value": round(p_value, 4)}
+
+    return {
+        "subjects": len(shared),
+        "per_label": {label: compare('per_label', i) for i, label in enumerate(a.labels)},
+        "macro": compare('macro'),
+        "micro": compare('micro'),
+    }
@@ -0,0 +1,177 @@
+from typing import Dict, Any, Optional
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+cache_modes = {'read_write', 'read_only', 'bypass'}
+
+
+class CompletionCache:
+    """
+    Persistent on-disk cache of LLM completions, keyed by a hash of the full request
+    (model, messages, response schema and sampling parameters) and the sample index, so repeated
+    sampling runs of the same request are cached as separate completions.
+    Backed by SQLite with a time-to-live and least-recently-used eviction once max_entries is exceeded,
+    checked every 1,000 writes and on close. Lookups mark completions as used in memory; the LRU order is written
+    back with the next put or on close, so reads never hold the database write lock.
+    Mode 'read_write' reads and stores, 'read_only' only reads, 'bypass' neither reads nor stores.
+    """
+
+    def __init__(
+        self,
+        path: str = "ai_json_output/completion_cache.sqlite",
+        mode: str = 'read_write',
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 100_000
+    ) -> None:
+        """
+        Open or create a completion cache.
+        Args:
+            path: SQLite database file (default: 'ai_json_output/completion_cache.sqlite')
+            mode: 'read_write', 'read_only' or 'bypass' (default: 'read_write')
+            ttl_seconds: Age after which a completion is no longer served (default: None, no expiry)
+            max_entries: Maximum number of cached completions kept after eviction (default: 100,000)
+        Raises:
+            ValueError: If mode is unknown.
+        """
+        if mode not in cache_modes:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {sorted(cache_modes)}")
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path: str = path
+        self.mode: str = mode
+        self.ttl_seconds: Optional[float] = ttl_seconds
+        self.max_entries: int = max_entries
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        # Keys looked up since the last write, mapped to their use tick
+        self._touched: Dict[str, int] = {}
+
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS completions "
+            "(key TEXT PRIMARY KEY, content TEXT NOT NULL, created REAL NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+        self.conn.commit()
+        # Monotonic use counter, so LRU order survives restarts
+        self._tick: int = self.conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM completions").fetchone()[0]
+
+    @staticmethod
+    def key(request: Dict[str, Any], sample: int = 0) -> str:
+        """
+        Build the cache key of a request.
+        Args:
+            request: JSON-serializable request parameters, with the response format given as its JSON schema
+            sample: Index of the sample among repeated runs of the same request (default: 0)
+        Returns:
+            Hex digest identifying the request and sample
+        """
+        keyed = {"request": request, "sample": sample}
+        return hashlib.sha256(json.dumps(keyed, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def get(self, request: Dict[str, Any], sample: int = 0) -> Optional[str]:
+        """
+        Look up a cached completion and mark it as recently used.
+        Args:
+            request: Request parameters
+            sample: Index of the sample among repeated runs of the same request (default: 0)
+        Returns:
+            Cached message content, or None on a miss, an expired entry or in bypass mode
+        """
+        if self.mode == 'bypass':
+            return None
+        key = self.key(request, sample)
+        row = self.conn.execute("SELECT content, created FROM completions WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl_seconds is not None and time.time() - row[1] > self.ttl_seconds):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.mode == 'read_write':
+            self._tick += 1
+            self._touched[key] = self._tick
+        return row[0]
+
+    def put(self, request: Dict[str, Any], content: str, sample: int = 0) -> None:
+        """
+        Store a completion, committed immediately so it survives a crash. Ignored unless the mode is 'read_write'.
+        Args:
+            request: Request parameters
+            content: Message content of the completion
+            sample: Index of the sample among repeated runs of the same request (default: 0)
+        """
+        if self.mode != 'read_write':
+            return
+        self._write_touched()
+        self._tick += 1
+        self.conn.execute(
+            "INSERT OR REPLACE INTO completions (key, content, created, last_used) VALUES (?, ?, ?, ?)",
+            (self.key(request, sample), content, time.time(), self._tick)
+        )
+        if self._tick % 1_000 == 0:
+            self.evict()
+        self.conn.commit()
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE completions SET last_used = ? WHERE key = ?",
+                [(tick, key) for key, tick in self._touched.items()]
+            )
+            self._touched = {}
+
+    def evict(self) -> int:
+        """
+        Delete expired completions and least recently used ones beyond max_entries.
+        Returns:
+            Number of evicted completions
+        """
+        evicted = 0
+        if self.ttl_seconds is not None:
+            evicted += self.conn.execute(
+                "DELETE FROM completions WHERE created < ?", (time.time() - self.ttl_seconds,)
+            ).rowcount
+        excess = self.conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM completions WHERE key IN (SELECT key FROM completions ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            evicted += excess
+        self.evictions += evicted
+        return evicted
+
+    def close(self) -> None:
+        """
+        Record the use of looked-up completions, evict, commit and close the database connection.
+        """
+        if self.mode == 'read_write':
+            self._write_touched()
+            self.evict()
+        self.conn.commit()
+        self.conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dictionary with hits, misses, hit rate, evictions and number of stored completions.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "entries": self.conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0],
+        }
+
+    def __enter__(self) -> "CompletionCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
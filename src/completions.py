@@ -0,0 +1,111 @@
+from typing import Dict, List, Any, Optional, Type
+from pydantic import BaseModel
+from src.dependencies import async_client
+from src.scheduler import RateLimitScheduler
+from src.completion_cache import CompletionCache
+from src.prompts import completion_params
+from src.telemetry import telemetry
+from src.resilience import Resilience, error_class
+import time
+
+# Shared by every chat completion call of the process, so all pipelines draw from the same rate limits
+scheduler = RateLimitScheduler.from_env()
+# Retries, backoff and the circuit breaker, likewise shared process-wide
+resilience = Resilience()
+
+# Expected completion size, charged to the token bucket until the real usage is known
+EXPECTED_COMPLETION_TOKENS = 2_000
+
+
+def estimate_tokens(messages: List[Dict[str, str]]) -> int:
+    """
+    Rough prompt size estimate of about four characters per token.
+    Args:
+        messages: Chat messages
+    Returns:
+        Estimated number of prompt tokens
+    """
+    return sum(len(message["content"]) for message in messages) // 4 + 4 * len(messages)
+
+
+# Opt-in completion cache shared by every call of the process, see use_completion_cache
+completion_cache: Optional[CompletionCache] = None
+
+
+def use_completion_cache(cache: Optional[CompletionCache]) -> None:
+    """
+    Set the completion cache consulted by parse_completion, or None to disable caching.
+    Args:
+        cache: CompletionCache instance, or None
+    """
+    global completion_cache
+    completion_cache = cache
+
+
+def use_async_client(client: Any) -> None:
+    """
+    Set the async client parse_completion calls, e.g. a src.fake_llm client for offline load tests.
+    Args:
+        client: AsyncOpenAI instance
+    """
+    global async_client
+    async_client = client
+
+
+async def parse_completion(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    response_format: Type[BaseModel] | Dict[str, Any],
+    temp: Optional[float] = None,
+    sample: int = 0
+) -> str:
+    """
+    Run a structured chat completion through the shared rate-limit scheduler, retrying transient errors.
+    Requests found in the completion cache return without calling the API or waiting on the scheduler.
+    Args:
+        model_name: Model to call
+        messages: Chat messages
+        response_format: Pydantic model of the structured output, or its precomputed response_format_param
+        temp: Sampling temperature, or None to use the model default
+        sample: Index of the sample among repeated runs of the same request, kept apart in the completion cache (default: 0)
+    Returns:
+        Message content of the completion (JSON string)
+    """
+    params = completion_params(model_name, messages, response_format, temp)
+    start = time.perf_counter()
+
+    cache = completion_cache
+    if cache is not None:
+        content = cache.get(params, sample)
+        if content is not None:
+            telemetry.record("chat", model_name, time.perf_counter() - start, cache_hit=True)
+            return content
+
+    estimated = estimate_tokens(messages) + EXPECTED_COMPLETION_TOKENS
+    attempts = 0
+
+    def attempt() -> Any:
+        nonlocal attempts
+        attempts += 1
+        # The raw response exposes the rate-limit headers to the scheduler
+        return scheduler.run(lambda: async_client.chat.completions.with_raw_response.create(**params), estimated)
+
+    try:
+        raw = await resilience.call(attempt)
+    except Exception as e:
+        telemetry.record("chat", model_name, time.perf_counter() - start, retries=attempts - 1, error=error_class(e))
+        raise
+    completion = raw.parse()
+    usage = completion.usage
+    scheduler.settle(estimated, getattr(usage, "total_tokens", None))
+    telemetry.record(
+        "chat", model_name, time.perf_counter() - start,
+        prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        cached_tokens=getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0) or 0,
+        retries=attempts - 1,
+    )
+    content = completion.choices[0].message.content
+    if cache is not None and content is not None:
+        cache.put(params, content, sample)
+    return content
@@ -0,0 +1,81 @@
+from typing import Dict, List, Any, Iterator
+from src.utils import categories
+import json
+
+
+class HumanCodingCorpus:
+    """
+    Human coding data loaded once and indexed by subject code.
+    Behaves like the list of entries it wraps (len, iteration, integer indexing), so it can be passed
+    wherever human_coding_with_transcript is expected.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]) -> None:
+        """
+        Index human coding entries by subject code and precompute lowercased ground truth quotes.
+        Args:
+            entries: List of human-coded transcript dictionaries
+        """
+        self.entries: List[Dict[str, Any]] = entries
+        self._by_subject: Dict[str, Dict[str, Any]] = {}
+        for entry in entries:
+            # Keep the first entry per subject code, as the linear scans did
+            self._by_subject.setdefault(entry['subject_code'], entry)
+        self._gt_lower: Dict[str, Dict[str, List[str]]] = {
+            subject_code: {acat: [a.lower() for a in entry.get('Human_'+acat, [])] for acat in categories}
+            for subject_code, entry in self._by_subject.items()
+        }
+
+    @classmethod
+    def from_json(cls, path: str) -> "HumanCodingCorpus":
+        """
+        Load human coding data from a JSON file.
+        Args:
+            path: Path to a JSON list of human-coded transcript dictionaries
+        Returns:
+            HumanCodingCorpus instance
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.entries)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return self.entries[index]
+
+    def __contains__(self, subject_code: str) -> bool:
+        return subject_code in self._by_subject
+
+    def subject_codes(self) -> List[str]:
+        """
+        Returns:
+            Subject codes in corpus order.
+        """
+        return list(self._by_subject)
+
+    def by_subject(self, subject_code: str) -> Dict[str, Any]:
+        """
+        Look up the entry of a subject.
+        Args:
+            subject_code: Subject code to look up
+        Returns:
+            Human coding entry of the subject
+        Raises:
+            KeyError: If the subject code is not in the corpus.
+        """
+        return self._by_subject[subject_code]
+
+    def gt_quotes(self, subject_code: str, category: str) -> List[str]:
+        """
+        Get the lowercased ground truth quotes of a subject for one category.
+        Args:
+            subject_code: Subject code to look up
+            category: Compact category code, e.g. 'LOC_E'
+        Returns:
+            List of lowercased quoted statements
+        """
+        return self._gt_lower[subject_code][category]
@@ -0,0 +1,190 @@
+from typing import Dict, List, Any, Optional, Set
+
+SEPARATOR = "\x00"
+
+
+class SubstringIndex:
+    """
+    Generalized suffix automaton over a growing set of strings, each added under an owner id.
+    Answers "which is the smallest owner of an indexed string containing this string" in time linear
+    in the length of the query, independent of how many strings are indexed.
+    """
+
+    def __init__(self) -> None:
+        self.next: List[Dict[str, int]] = [{}]
+        self.link: List[int] = [-1]
+        self.length: List[int] = [0]
+        # Smallest owner of an indexed string containing the substrings a state stands for
+        self.owner: List[float] = [float("inf")]
+        self.last: int = 0
+
+    def add(self, text: str, owner: int) -> None:
+        """
+        Index a string.
+        Args:
+            text: String to index; must not contain the separator character
+            owner: Owner id of the string; strings may share an owner
+        """
+        # Standard online suffix automaton construction, with attributes bound locally for speed
+        nxt, link, length, owners = self.next, self.link, self.length, self.owner
+        last = self.last
+        for char in text + SEPARATOR:
+            cur = len(length)
+            nxt.append({})
+            link.append(0)
+            length.append(length[last] + 1)
+            owners.append(float("inf"))
+
+            p = last
+            while p != -1 and char not in nxt[p]:
+                nxt[p][char] = cur
+                p = link[p]
+            if p != -1:
+                q = nxt[p][char]
+                if length[p] + 1 == length[q]:
+                    link[cur] = q
+                else:
+                    clone = len(length)
+                    nxt.append(dict(nxt[q]))
+                    link.append(link[q])
+                    length.append(length[p] + 1)
+                    owners.append(owners[q])
+                    while p != -1 and nxt[p].get(char) == q:
+                        nxt[p][char] = clone
+                        p = link[p]
+                    link[q] = clone
+                    link[cur] = clone
+            last = cur
+            # Every suffix of the current prefix occurs in this string; ancestors already at or
+            # below owner have all their own ancestors at or below it too
+            p = cur
+            while p != -1 and owners[p] > owner:
+                owners[p] = owner
+                p = link[p]
+        self.last = last
+
+    def find(self, text: str) -> Optional[int]:
+        """
+        Find the smallest owner of an indexed string containing text.
+        Args:
+            text: String to look up
+        Returns:
+            Owner id, or None if no indexed string contains text
+        """
+        state = 0
+        for char in text:
+            state = self.next[state].get(char, -1)
+            if state == -1:
+                return None
+        owner = self.owner[state]
+        return None if owner == float("inf") else int(owner)
+
+
+class ContainedIndex:
+    """
+    Trie of reversed strings, each held by one or more owner ids.
+    Answers "which is the smallest owner of a string contained in this string" by walking back
+    from every end position of the query, stopping as soon as no indexed string can match.
+    """
+
+    def __init__(self) -> None:
+        self.root: Dict[str, Any] = {}
+
+    def add(self, text: str, owner: int) -> None:
+        node = self.root
+        for char in reversed(text):
+            node = node.setdefault(char, {})
+        node.setdefault(SEPARATOR, set()).add(owner)
+
+    def remove(self, text: str, owner: int) -> None:
+        node = self.root
+        for char in reversed(text):
+            node = node[char]
+        node[SEPARATOR].discard(owner)
+
+    def find(self, text: str) -> Optional[int]:
+        """
+        Args:
+            text: String to look up
+        Returns:
+            Smallest owner of an indexed string contained in text, or None
+        """
+        best: Optional[int] = None
+        for end in range(len(text), -1, -1):
+            node = self.root
+            pos = end
+            while True:
+                owners: Set[int] = node.get(SEPARATOR, set())
+                if owners:
+                    smallest = min(owners)
+                    best = smallest if best is None else min(best, smallest)
+                if pos == 0:
+                    break
+                pos -= 1
+                node = node.get(text[pos])
+                if node is None:
+                    break
+        return best
+
+
+def deduplicate_items_indexed(
+    items: List[Dict[str, Any]],
+    norms: List[str],
+    index_after: int = 64
+) -> List[Dict[str, Any]]:
+    """
+    Deduplicate the items of one subcategory with the same result as the pairwise engine of
+    deduplicate_attribution_entries: items are visited in input order, and each one is compared with the
+    first kept item that contains it or that it contains. It replaces that item if it contains it and its
+    raw quote is longer, and is dropped otherwise; an item overlapping no kept item is kept.
+    The first overlapping kept item is looked up in a SubstringIndex (kept quotes containing the item) and a
+    ContainedIndex (kept quotes contained in the item) once there are enough kept items; below that, direct
+    substring checks are cheaper.
+    Args:
+        items: Attribution items in input order
+        norms: Normalized quoted statement of each item
+        index_after: Number of kept quotes from which the indexes are used (default: 64)
+    Returns:
+        Deduplicated items in the order they were first kept
+    """
+    kept_norms: List[str] = []
+    kept: List[Dict[str, Any]] = []
+    containing: Optional[SubstringIndex] = None
+    contained: Optional[ContainedIndex] = None
+    # First overlapping kept item of each looked-up quote. A kept item appended later has a larger position and
+    # cannot become the first, so only replacements invalidate it; repeated quotes across runs then cost one lookup.
+    owners: Dict[str, Optional[int]] = {}
+    for item, norm in zip(items, norms):
+        norm = norm.replace(SEPARATOR, "")
+        if norm in owners:
+            owner = owners[norm]
+        elif containing is None or contained is None:
+            owner = next((j for j, k in enumerate(kept_norms) if k in norm or norm in k), None)
+        else:
+            candidates = [j for j in (containing.find(norm), contained.find(norm)) if j is not None]
+            owner = min(candidates) if candidates else None
+
+        if owner is None:
+            kept_norms.append(norm)
+            kept.append(item)
+            owners[norm] = len(kept) - 1
+            if containing is not None and contained is not None:
+                containing.add(norm, len(kept) - 1)
+                contained.add(norm, len(kept) - 1)
+            elif len(kept_norms) >= index_after:
+                containing, contained = SubstringIndex(), ContainedIndex()
+                for j, k in enumerate(kept_norms):
+                    containing.add(k, j)
+                    contained.add(k, j)
+        elif kept_norms[owner] in norm and len(item['quoted_statement']) > len(kept[owner]['quoted_statement']):
+            # The replaced quote is contained in the new one, so the SubstringIndex can keep it
+            if containing is not None and contained is not None:
+                contained.remove(kept_norms[owner], owner)
+                containing.add(norm, owner)
+                contained.add(norm, owner)
+            kept_norms[owner] = norm
+            kept[owner] = item
+            owners = {}
+        else:
+            owners[norm] = owner
+    return kept
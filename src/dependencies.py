@@ -1,5 +1,7 @@
 from dotenv import load_dotenv
-from openai import OpenAI
+from typing import Any
+from openai import OpenAI, AsyncOpenAI, DefaultAsyncHttpxClient, Timeout
+import importlib
 import os
 import json
 
@@ -13,3 +15,46 @@ if api_key:
     os.environ['OPENAI_API_KEY'] = api_key
 else:
     print('Warning: OPENAI_API_KEY not found in .env file')
+
+
+def sdk_httpx() -> Any:
+    """
+    Returns:
+        The httpx package the openai SDK is built on, which need not be the one installed as httpx
+        (openai 3.x uses httpx2). Limits and timeouts given to its client must come from this package.
+    """
+    return importlib.import_module(DefaultAsyncHttpxClient.__mro__[1].__module__.split('.')[0])
+
+
+def build_async_http_client() -> Any:
+    """
+    Build the shared HTTP connection pool of the async client from environment variables:
+    OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE_CONNECTIONS, OPENAI_KEEPALIVE_EXPIRY (seconds),
+    OPENAI_HTTP2 (true/false), OPENAI_TIMEOUT and OPENAI_CONNECT_TIMEOUT (seconds).
+    Returns:
+        AsyncClient of the SDK's httpx (see sdk_httpx) with the configured limits and timeouts
+    """
+    http2 = os.getenv('OPENAI_HTTP2', 'false').lower() in ('1', 'true', 'yes')
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            print('Warning: OPENAI_HTTP2 is set but the h2 package is not installed, using HTTP/1.1')
+            http2 = False
+    return DefaultAsyncHttpxClient(
+        limits=sdk_httpx().Limits(
+            max_connections=int(os.getenv('OPENAI_MAX_CONNECTIONS', 100)),
+            max_keepalive_connections=int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', 20)),
+            keepalive_expiry=float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', 30)),
+        ),
+        timeout=Timeout(
+            float(os.getenv('OPENAI_TIMEOUT', 600)),
+            connect=float(os.getenv('OPENAI_CONNECT_TIMEOUT', 10)),
+        ),
+        http2=http2,
+    )
+
+
+# Awaited directly by the pipelines, so concurrent calls share one event loop and connection pool.
+# Retries are handled by src.resilience, which also sees the 429s the scheduler adapts to.
+async_client = AsyncOpenAI(api_key=api_key, http_client=build_async_http_client(), max_retries=0)
@@ -1,10 +1,11 @@
 
-from definitions.coding_manuals import system_manual, system_prompt_topic
-from definitions.instructions import inference_instructions_topic
+from definitions.coding_manuals import system_manual
+from src.prompts import topic_prompts, expert_messages
 from src.utils import consolidate_reasoning_chain
-from src.dependencies import client
+from src.completions import parse_completion
+from src.journal import EntryJournal
+from src.telemetry import tagged
 import asyncio
-from definitions.models import AttributionResponse, ReviewResponse, reduce_model_to_field
 import json
 import os
 from typing import Dict, Any, Type, List
@@ -16,46 +17,26 @@ async def run_topic_inference(
     topic: str,
     entry: Dict[str, Any],
     model_name: str,
-    temp: float | None
+    temp: float | None,
+    journal: EntryJournal | None = None,
+    run_index: int = 0
 ) -> Dict[str, Any]:
     """
     Run inference for a single topic and entry using the specified model and temperature.
+    If a journal is given, a result already journaled for this run is reused and a new one is appended to it.
     Returns the parsed JSON response as a dictionary.
     """
-    messages = [
-        {
-            "role": "system",
-            "content": system_prompt_topic(topic),
-        },
-        {"role": "user", "content": f"Test Case Interview Transcript: \n{entry['transcript']}"},
-        {"role": "user", "content": "INSTRUCTIONS: " + inference_instructions_topic(topic)},
-    ]
-    if temp is None:
-        def blocking_completion() -> Any:
-            return client.chat.completions.parse(
-                model=model_name,
-                messages=messages,
-                response_format=reduce_model_to_field(AttributionResponse, topic),
-                top_p=1,
-                presence_penalty=0,
-                frequency_penalty=0,
-                seed=42,
-            )
-    else:
-        def blocking_completion() -> Any:
-            return client.chat.completions.parse(
-                model=model_name,
-                messages=messages,
-                response_format=reduce_model_to_field(AttributionResponse, topic),
-                temperature=temp,
-                top_p=1,
-                presence_penalty=0,
-                frequency_penalty=0,
-                seed=42,
-            )
+    if journal is not None:
+        content = journal.get(run_index, topic)
+        if content is not None:
+            return json.loads(content)
 
-    completion = await asyncio.to_thread(blocking_completion)
-    return json.loads(completion.choices[0].message.content)
+    messages = expert_messages(topic, entry['transcript'])
+    with tagged(topic=topic, run_index=run_index, round=0, step='result'):
+        content = await parse_completion(model_name, messages, topic_prompts[topic].response_format, temp, sample=run_index)
+    if journal is not None:
+        journal.append(run_index, topic, 0, 'result', content)
+    return json.loads(content)
 
 # ---- Async loop over entries and runs ----
 async def process_entry(
@@ -64,10 +45,15 @@ async def process_entry(
     model_name: str,
     temp: float | None,
     file_path: str,
-    runs: int = 3
+    runs: int = 3,
+    max_concurrent_calls: int | None = None
 ) -> None:
     """
     Run inference for all topics for a given entry, multiple times, and save results to file.
+    All runs x topics calls are started at once, at most max_concurrent_calls at a time (default: no per-entry limit,
+    the shared scheduler still applies), and compiled into one result per run in run order.
+    Completed calls are journaled, so a restarted entry only issues the missing ones; the journal is
+    removed once the per-subject file is written.
     """
     compiled: list[dict[str, Any]] = []
     file_name = f"{entry['subject_code']}.json"
@@ -75,14 +61,23 @@ async def process_entry(
     os.makedirs(file_folder, exist_ok=True)
     file_path = os.path.join(file_folder, file_name)
 
-    for run_index in range(runs):
-        tasks = [run_topic_inference(topic, entry, model_name, temp) for topic in topics]
+    journal = EntryJournal(run_id, entry['subject_code'])
+    semaphore = asyncio.Semaphore(max_concurrent_calls) if max_concurrent_calls else None
+
+    async def limited_inference(topic: str, run_index: int) -> Dict[str, Any]:
+        if semaphore is None:
+            return await run_topic_inference(topic, entry, model_name, temp, journal, run_index)
+        async with semaphore:
+            return await run_topic_inference(topic, entry, model_name, temp, journal, run_index)
+
+    tasks = [limited_inference(topic, run_index) for run_index in range(runs) for topic in topics]
+    with tagged(run_id=run_id, subject=entry['subject_code']):
         results = await asyncio.gather(*tasks)
+    for run_index in range(runs):
         this_run: dict[str, Any] = {}
-        [this_run.update(result) for result in results]
+        [this_run.update(result) for result in results[run_index * len(topics):(run_index + 1) * len(topics)]]
         compiled.append(this_run)
-        await asyncio.sleep(1)
 
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(compiled, f, indent=2, ensure_ascii=False)
-        await asyncio.sleep(10)
+    journal.discard()
@@ -0,0 +1,338 @@
+from typing import Dict, List, Any, Optional, Tuple
+from definitions.models import ReviewResponse, ReviewCategory
+from src.prompts import topic_prompts
+from src.scheduler import TokenBucket
+from openai import OpenAI, AsyncOpenAI
+import numpy as np
+import argparse
+import tempfile
+import asyncio
+import hashlib
+import base64
+import random
+import httpx
+import json
+import time
+import sys
+import re
+import os
+
+FAKE_BASE_URL = "http://fake-llm.local/v1"
+
+
+class FakeLLM(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    In-process stand-in for the OpenAI API, served as an httpx transport so the SDK, the scheduler and the
+    retry logic run unchanged. Answers chat completions with schema-valid AttributionResponse or ReviewResponse
+    payloads quoting sentences of the transcript in the prompt, and embeddings with vectors derived from the
+    input text. Latency is lognormal; server errors and 429s are injected at random or from rate limits.
+    """
+
+    def __init__(
+        self,
+        latency_median_s: float = 0.5,
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after_s: float = 1.0,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        quotes_per_category: int = 2,
+        empty_review_rate: float = 0.3,
+        embedding_dimensions: int = 1536,
+        seed: int = 42
+    ) -> None:
+        """
+        Args:
+            latency_median_s: Median latency of a successful call in seconds (default: 0.5)
+            latency_sigma: Sigma of the lognormal latency distribution (default: 0.5)
+            error_rate: Share of calls answered with a 500 error (default: 0)
+            rate_limit_rate: Share of calls answered with a 429 regardless of the rate limits (default: 0)
+            retry_after_s: Retry-after of the injected 429s in seconds (default: 1)
+            requests_per_minute: Request rate limit enforced with 429s (default: None, unlimited)
+            tokens_per_minute: Token rate limit enforced with 429s (default: None, unlimited)
+            quotes_per_category: Average number of quotes per attribution category (default: 2)
+            empty_review_rate: Share of reviews without review items, ending the reflexion of a topic (default: 0.3)
+            embedding_dimensions: Length of the embedding vectors (default: 1536)
+            seed: Random seed (default: 42)
+        """
+        self.latency_median_s: float = latency_median_s
+        self.latency_sigma: float = latency_sigma
+        self.error_rate: float = error_rate
+        self.rate_limit_rate: float = rate_limit_rate
+        self.retry_after_s: float = retry_after_s
+        self.requests: Optional[TokenBucket] = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens: Optional[TokenBucket] = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.quotes_per_category: int = quotes_per_category
+        self.empty_review_rate: float = empty_review_rate
+        self.embedding_dimensions: int = embedding_dimensions
+        self.rng: random.Random = random.Random(seed)
+        self.stats: Dict[str, int] = {"chat": 0, "embeddings": 0, "errors": 0, "rate_limited": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        self._topics_by_prompt: Dict[str, str] = {prompt.system_prompt: topic for topic, prompt in topic_prompts.items()}
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        latency, response = self.respond(request)
+        time.sleep(latency)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        latency, response = self.respond(request)
+        await asyncio.sleep(latency)
+        return response
+
+    def respond(self, request: httpx.Request) -> Tuple[float, httpx.Response]:
+        """
+        Answer one API request.
+        Args:
+            request: Request sent by the SDK
+        Returns:
+            Latency to simulate in seconds, and the response
+        """
+        body = json.loads(request.content or b"{}")
+        if request.url.path.endswith("/chat/completions"):
+            prompt_tokens = len(json.dumps(body.get("messages", []), ensure_ascii=False)) // 4
+        elif request.url.path.endswith("/embeddings"):
+            prompt_tokens = sum(len(text) for text in self._inputs(body)) // 4
+        else:
+            return 0.0, self._error(404, "not_found", f"Unknown path {request.url.path}")
+
+        limited = self._rate_limited(prompt_tokens)
+        if limited is not None:
+            return 0.01, limited
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return self._latency() / 2, self._error(500, "server_error", "Injected server error")
+
+        if request.url.path.endswith("/chat/completions"):
+            payload = self._chat(body, prompt_tokens)
+        else:
+            payload = self._embeddings(body, prompt_tokens)
+        return self._latency(), httpx.Response(200, json=payload, headers=self._headers())
+
+    def _latency(self) -> float:
+        return self.latency_median_s * float(np.exp(self.rng.gauss(0, self.latency_sigma)))
+
+    def _error(self, status: int, kind: str, message: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        return httpx.Response(status, json={"error": {"message": message, "type": kind, "code": kind}}, headers=headers)
+
+    def _rate_limited(self, prompt_tokens: int) -> Optional[httpx.Response]:
+        wait = 0.0
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(prompt_tokens))
+        if wait == 0 and self.rng.random() < self.rate_limit_rate:
+            wait = self.retry_after_s
+        if wait > 0:
+            self.stats["rate_limited"] += 1
+            return self._error(429, "rate_limit_exceeded", "Injected rate limit", {"retry-after-ms": str(int(wait * 1000))})
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(prompt_tokens)
+        return None
+
+    def _headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if bucket is not None:
+                bucket.wait_time(0)  # refills the level
+                headers[f"x-ratelimit-remaining-{kind}"] = str(max(0, int(bucket.level)))
+                headers[f"x-ratelimit-reset-{kind}"] = f"{(bucket.max_per_minute - bucket.level) * 60 / bucket.per_minute:.3f}s"
+        return headers
+
+    @staticmethod
+    def _inputs(body: Dict[str, Any]) -> List[str]:
+        inputs = body.get("input", [])
+        return [inputs] if isinstance(inputs, str) else [str(text) for text in inputs]
+
+    def _sentences(self, messages: List[Dict[str, Any]]) -> List[str]:
+        for message in messages:
+            content = message.get("content")
+            if isinstance(content, str) and content.startswith("Test Case Interview Transcript"):
+                transcript = content.split("\n", 1)[-1]
+                sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", transcript) if s.strip()]
+                if sentences:
+                    return sentences
+        return ["I don't know."]
+
+    def _quotes(self, sentences: List[str]) -> List[str]:
+        k = max(0, int(round(self.rng.gauss(self.quotes_per_category, 1))))
+        return self.rng.sample(sentences, min(k, len(sentences)))
+
+    def _chat(self, body: Dict[str, Any], prompt_tokens: int) -> Dict[str, Any]:
+        messages = body.get("messages", [])
+        sentences = self._sentences(messages)
+        schema = body.get("response_format", {}).get("json_schema", {})
+        topic = self._topics_by_prompt.get(messages[0].get("content") if messages else None)
+
+        if schema.get("name") == "ReviewResponse":
+            items = []
+            if self.rng.random() >= self.empty_review_rate:
+                categories = topic_prompts[topic].subcategories if topic else [category.value for category in ReviewCategory]
+                for _ in range(self.rng.randint(1, 3)):
+                    category = self.rng.choice(categories)
+                    items.append({
+                        "category": category,
+                        "critique": self.rng.choice(["missing", "superfluous"]),
+                        "quoted_statement": self.rng.choice(sentences),
+                        "reasoning": f"Does not meet the {category} criteria as coded.",
+                    })
+            content = ReviewResponse.model_validate({"reviews": items}).model_dump_json()
+        else:
+            topic = next(iter(schema.get("schema", {}).get("properties", {})), topic)
+            prompt = topic_prompts[topic]
+            payload = {topic: {
+                subcat: [{"quoted_statement": quote, "reasoning": f"Meets the {subcat} inclusion criteria."} for quote in self._quotes(sentences)]
+                for subcat in prompt.subcategories
+            }}
+            content = prompt.response_model.model_validate(payload).model_dump_json()
+
+        completion_tokens = len(content) // 4
+        self.stats["chat"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["completion_tokens"] += completion_tokens
+        return {
+            "id": f"chatcmpl-fake-{self.stats['chat']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": content, "refusal": None},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0},
+            },
+        }
+
+    def _embeddings(self, body: Dict[str, Any], prompt_tokens: int) -> Dict[str, Any]:
+        data = []
+        for index, text in enumerate(self._inputs(body)):
+            # Same text, same vector
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+            vector = np.random.default_rng(seed).standard_normal(self.embedding_dimensions).astype(np.float32)
+            vector /= np.linalg.norm(vector)
+            if body.get("encoding_format") == "base64":
+                embedding: Any = base64.b64encode(vector.tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        self.stats["embeddings"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        }
+
+
+def fake_clients(fake: FakeLLM) -> Tuple[OpenAI, AsyncOpenAI]:
+    """
+    Build OpenAI clients served by a FakeLLM.
+    Args:
+        fake: FakeLLM instance
+    Returns:
+        Sync client (SDK default retries, like src.dependencies.client) and async client (no SDK retries,
+        like src.dependencies.async_client)
+    """
+    return (
+        OpenAI(api_key="fake", base_url=FAKE_BASE_URL, http_client=httpx.Client(transport=fake)),
+        AsyncOpenAI(api_key="fake", base_url=FAKE_BASE_URL, http_client=httpx.AsyncClient(transport=fake), max_retries=0),
+    )
+
+
+def install(fake: FakeLLM) -> None:
+    """
+    Route the clients of src.dependencies and the calls of parse_completion through a FakeLLM.
+    Must run before src.with_retrieval is imported, as that module binds the client and creates its embeddings at
+    import time; the pipelines import it lazily, on the first retrieval call. An unset OPENAI_API_KEY is set to a
+    placeholder.
+    Args:
+        fake: FakeLLM instance
+    Raises:
+        RuntimeError: If src.with_retrieval was already imported with the real client.
+    """
+    if "src.with_retrieval" in sys.modules:
+        raise RuntimeError("src.with_retrieval was imported before install(), so it uses the real OpenAI client; install the fake LLM first")
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    import src.dependencies as dependencies
+    from src.completions import use_async_client
+
+    dependencies.client, dependencies.async_client = fake_clients(fake)
+    use_async_client(dependencies.async_client)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load-test a pipeline end to end against the in-process fake LLM on synthetic data. "
+                    "Client-side limits come from OPENAI_RPM, OPENAI_TPM and OPENAI_MAX_CONCURRENCY."
+    )
+    parser.add_argument("--approach", default="experts", choices=["experts", "reflexion", "retrieval"],
+                        help="The reflexion approaches first run experts for their initial outputs")
+    parser.add_argument("--subjects", type=int, default=20)
+    parser.add_argument("--sentences", type=int, default=120)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="Median latency in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=float, default=None, help="Server-side request limit")
+    parser.add_argument("--tpm", type=float, default=None, help="Server-side token limit")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="fake_llm_output.json")
+    args = parser.parse_args()
+
+    fake = FakeLLM(
+        latency_median_s=args.latency,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        requests_per_minute=args.rpm,
+        tokens_per_minute=args.tpm,
+        seed=args.seed,
+    )
+    install(fake)
+
+    from src.synthetic import generate_corpus, write_corpus
+    output = os.path.abspath(args.output)
+    corpus = generate_corpus(n_subjects=args.subjects, sentences_per_transcript=args.sentences, runs=args.runs, seed=args.seed)
+    # The pipelines read and write data/ and ai_json_output/ relative to the working directory
+    os.chdir(tempfile.mkdtemp(prefix="fake_llm_"))
+    write_corpus(corpus, ".")
+
+    from src.orchestrator import run_corpus
+    from src.completions import scheduler, resilience
+    from src.telemetry import telemetry
+
+    results: Dict[str, Any] = {}
+    results["experts"] = asyncio.run(run_corpus(corpus["human_coding"], "experts", "fake_experts", "fake-model", 1, args.max_in_flight, args.runs))
+    if args.approach != "experts":
+        results[args.approach] = asyncio.run(run_corpus(
+            corpus["human_coding"], args.approach, f"fake_{args.approach}", "fake-model", 1, args.max_in_flight,
+            args.runs, source_run_id="fake_experts"
+        ))
+
+    wall_s = sum(result["wall_s"] for result in results.values())
+    report = {
+        "config": vars(args),
+        "results": results,
+        "chat_calls_per_s": round(fake.stats["chat"] / wall_s, 2) if wall_s else None,
+        "server": fake.stats,
+        "scheduler": scheduler.stats,
+        "resilience": resilience.stats(),
+        "telemetry": telemetry.summary(),
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
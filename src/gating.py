@@ -0,0 +1,167 @@
+from typing import Dict, List, Any, Optional
+from definitions.coding_manuals import system_manual
+from src.utils import merge_multiple_ai_runs, normalize, calculate_f1_scores_from_path
+import json
+import os
+
+topics = list(system_manual.keys())
+
+
+def topic_disagreement(initial_response: List[Dict[str, Any]], topic: str) -> float:
+    """
+    Measure how much the initial runs disagree on a topic.
+    The runs are merged with merge_multiple_ai_runs, and a merged quote counts as agreed if every run
+    has it (or a quote containing it, or contained in it) in the same category.
+    Args:
+        initial_response: Initial expert runs of a subject
+        topic: Attribution topic
+    Returns:
+        Share of the topic's merged quotes not found by every run, from 0 (exact agreement) to 1.
+        A single run gives no measure of agreement and counts as 1.
+    """
+    if len(initial_response) < 2:
+        return 1.0
+    merged = merge_multiple_ai_runs([{topic: run.get(topic, {})} for run in initial_response]).get(topic, {})
+
+    total = 0
+    agreed = 0
+    for subcat, items in merged.items():
+        run_quotes = [[normalize(item['quoted_statement']) for item in run.get(topic, {}).get(subcat, [])] for run in initial_response]
+        for item in items:
+            quote = normalize(item['quoted_statement'])
+            total += 1
+            agreed += all(any(quote in other or other in quote for other in quotes) for quotes in run_quotes)
+    return 1 - agreed / total if total else 0.0
+
+
+def gate_topics(initial_response: List[Dict[str, Any]], threshold: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Decide which topics of a subject need reflexion.
+    Args:
+        initial_response: Initial expert runs of a subject
+        threshold: Topics whose disagreement is above the threshold are reflected on; 0 skips only topics
+            on which the runs agree exactly
+    Returns:
+        Dictionary mapping each topic to its disagreement and whether it is reflected on
+    """
+    decisions: Dict[str, Dict[str, Any]] = {}
+    for topic in topics:
+        disagreement = topic_disagreement(initial_response, topic)
+        decisions[topic] = {"disagreement": round(disagreement, 4), "reflect": disagreement > threshold}
+    return decisions
+
+
+def gating_path(run_id: str, subject_code: str, folder: str = "ai_json_output") -> str:
+    """
+    Args:
+        run_id: Run folder name
+        subject_code: Subject code of the entry
+        folder: Root output folder (default: 'ai_json_output')
+    Returns:
+        Path of the subject's gating decisions, <folder>/<run_id>/gating/<subject_code>.json
+    """
+    return os.path.join(folder, run_id, "gating", f"{subject_code}.json")
+
+
+def save_gating(
+    run_id: str,
+    subject_code: str,
+    threshold: float,
+    decisions: Dict[str, Dict[str, Any]],
+    folder: str = "ai_json_output"
+) -> None:
+    """
+    Record the gating decisions of a subject.
+    Args:
+        run_id: Run folder name
+        subject_code: Subject code of the entry
+        threshold: Disagreement threshold used
+        decisions: Decisions returned by gate_topics
+        folder: Root output folder (default: 'ai_json_output')
+    """
+    path = gating_path(run_id, subject_code, folder)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"threshold": threshold, "topics": decisions}, f, indent=2, ensure_ascii=False)
+
+
+def reflexion_calls(messages: List[Dict[str, str]]) -> int:
+    """
+    Count the review and LLM revise calls recorded in a topic's reflexion conversation.
+    Args:
+        messages: Conversation of the topic from a reflection file
+    Returns:
+        Number of calls
+    """
+    return sum(
+        message['role'] == 'user' and message['content'].lstrip().startswith(('Review Attribution Analysis', 'Revise Attribution Analysis'))
+        for message in messages
+    )
+
+
+def gating_report(
+    human_coding_with_transcript: Any,
+    run_id: str,
+    reference_run_id: Optional[str] = None,
+    max_rounds: int = 2,
+    threshold: int = 50,
+    folder: str = "ai_json_output"
+) -> Dict[str, Any]:
+    """
+    Summarize the gating decisions of a gated reflexion run, the calls they saved and their F1 impact.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        run_id: Gated reflexion run folder name
+        reference_run_id: Ungated reflexion run of the same subjects and settings; if given, the calls saved are
+            counted from its reflection files and the F1 impact is measured against it (default: None)
+        max_rounds: Review/revise rounds per topic, bounding the calls saved without a reference (default: 2)
+        threshold: Fuzzy match threshold of the F1 scores (default: 50)
+        folder: Root output folder (default: 'ai_json_output')
+    Returns:
+        Dictionary with topic counts, calls saved, the F1 scores of both runs and their macro/micro F1 differences
+    """
+    gating_folder = os.path.join(folder, run_id, "gating")
+    subjects = 0
+    reflected = 0
+    skipped = 0
+    calls_saved_reference: Optional[int] = 0 if reference_run_id else None
+    by_topic: Dict[str, Dict[str, int]] = {topic: {"reflected": 0, "skipped": 0} for topic in topics}
+
+    for file_name in sorted(os.listdir(gating_folder)) if os.path.isdir(gating_folder) else []:
+        if not file_name.endswith('.json'):
+            continue
+        with open(os.path.join(gating_folder, file_name), "r", encoding="utf-8") as f:
+            decisions = json.load(f)["topics"]
+        subjects += 1
+        conversations: Dict[str, List[Dict[str, str]]] = {}
+        if reference_run_id:
+            reference_reflection = os.path.join(folder, reference_run_id, "reflection", f"reflection_{file_name}")
+            try:
+                with open(reference_reflection, "r", encoding="utf-8") as f:
+                    conversations = json.load(f)
+            except Exception as e:
+                print(f"Error processing {reference_reflection}: {e}")
+        for topic, decision in decisions.items():
+            if decision["reflect"]:
+                reflected += 1
+                by_topic[topic]["reflected"] += 1
+                continue
+            skipped += 1
+            by_topic[topic]["skipped"] += 1
+            if calls_saved_reference is not None:
+                calls_saved_reference += reflexion_calls(conversations.get(topic, []))
+
+    report: Dict[str, Any] = {
+        "subjects": subjects,
+        "topics_reflected": reflected,
+        "topics_skipped": skipped,
+        "by_topic": by_topic,
+        "max_calls_saved": skipped * 2 * max_rounds,
+        "calls_saved": calls_saved_reference,
+        "f1": calculate_f1_scores_from_path(human_coding_with_transcript, os.path.join(folder, run_id), threshold),
+    }
+    if reference_run_id:
+        report["reference_f1"] = calculate_f1_scores_from_path(human_coding_with_transcript, os.path.join(folder, reference_run_id), threshold)
+        report["macro_f1_delta"] = round(report["f1"]["macro_f1"] - report["reference_f1"]["macro_f1"], 3)
+        report["micro_f1_delta"] = round(report["f1"]["micro_f1"] - report["reference_f1"]["micro_f1"], 3)
+    return report
@@ -0,0 +1,84 @@
+from typing import Dict, Tuple, Optional
+import json
+import os
+
+
+class EntryJournal:
+    """
+    Append-only JSONL journal of the completed LLM calls of one subject, kept at
+    ai_json_output/<run_id>/journal/<subject_code>.jsonl while the entry is in progress.
+    Each line records one (run_index, topic, round, step) result as soon as it completes, so a
+    restarted pipeline replays the journal and only issues the missing calls.
+    """
+
+    def __init__(self, run_id: str, subject_code: str, folder: str = "ai_json_output") -> None:
+        """
+        Open the journal of a subject, replaying any records already written.
+        Args:
+            run_id: Run folder name
+            subject_code: Subject code of the entry
+            folder: Root output folder (default: 'ai_json_output')
+        """
+        self.subject_code: str = subject_code
+        self.path: str = os.path.join(folder, run_id, "journal", f"{subject_code}.jsonl")
+        self.records: Dict[Tuple[int, str, int, str], str] = {}
+        self.replayed: int = 0
+        if os.path.exists(self.path):
+            # Byte offset just past the last complete line
+            complete = 0
+            with open(self.path, "rb+") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # A crash can leave a partial last line; cut it so the next record starts on its own line
+                        f.truncate(complete)
+                        break
+                    complete += len(line)
+                    try:
+                        record = json.loads(line.decode("utf-8"))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        continue
+                    self.records[(record['run_index'], record['topic'], record['round'], record['step'])] = record['content']
+            self.replayed = len(self.records)
+
+    def get(self, run_index: int, topic: str, round: int = 0, step: str = 'result') -> Optional[str]:
+        """
+        Args:
+            run_index: Sampling repetition.
+            topic: Attribution topic.
+            round: Reflexion round (0 for expert calls).
+            step: Call within the round, e.g. 'result', 'review' or 'revise'.
+        Returns:
+            Journaled completion content, or None if the call has not completed.
+        """
+        return self.records.get((run_index, topic, round, step))
+
+    def append(self, run_index: int, topic: str, round: int, step: str, content: str) -> None:
+        """
+        Record a completed call and flush it to disk.
+        Args:
+            run_index: Sampling repetition
+            topic: Attribution topic
+            round: Reflexion round (0 for expert calls)
+            step: Call within the round, e.g. 'result', 'review' or 'revise'
+            content: Completion content
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        record = {
+            "subject": self.subject_code,
+            "run_index": run_index,
+            "topic": topic,
+            "round": round,
+            "step": step,
+            "content": content,
+        }
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records[(run_index, topic, round, step)] = content
+
+    def discard(self) -> None:
+        """
+        Remove the journal once the entry has been compacted into its per-subject file.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.records = {}
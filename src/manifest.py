@@ -0,0 +1,119 @@
+from typing import Dict, List, Any, Optional, Iterable
+import hashlib
+import json
+import os
+
+
+class RunManifest:
+    """
+    Evaluation manifest kept next to an ai_json_output/<run_id> folder as <run_id>.manifest.json.
+    For every subject file it records the file hash, a hash of the subject's ground truth and the
+    confusion matrices already computed for each threshold and matching method, so unchanged files
+    are not re-scored.
+    """
+
+    def __init__(self, ai_output_path: str) -> None:
+        """
+        Load the manifest of a run folder, or start an empty one.
+        Args:
+            ai_output_path: Path to the run folder with AI output JSON files
+        """
+        self.path: str = os.path.normpath(ai_output_path) + ".manifest.json"
+        self.hits: int = 0
+        self.misses: int = 0
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Ignoring unreadable manifest {self.path}: {e}")
+
+    @staticmethod
+    def file_hash(pathfile: str) -> str:
+        """
+        Args:
+            pathfile: Path to a file.
+        Returns:
+            sha256 hex digest of the file contents.
+        """
+        with open(pathfile, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    @staticmethod
+    def ground_truth_hash(human_entry: Dict[str, Any], categories: List[str]) -> str:
+        """
+        Args:
+            human_entry: Human coding entry of a subject.
+            categories: Compact category codes whose ground truth is hashed.
+        Returns:
+            sha256 hex digest of the subject's ground truth quotes.
+        """
+        gt = {acat: human_entry['Human_'+acat] for acat in categories}
+        return hashlib.sha256(json.dumps(gt, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    def lookup(
+        self,
+        file_name: str,
+        file_hash: str,
+        gt_hash: str,
+        key: str
+    ) -> Optional[Dict[str, Dict[str, int]]]:
+        """
+        Get cached confusion matrices of a subject file.
+        Args:
+            file_name: Subject file name within the run folder
+            file_hash: Current hash of the file
+            gt_hash: Current hash of the subject's ground truth
+            key: Evaluation settings key f"{method}:{backend}@{threshold}", e.g. 'exhaustive:compat@50'
+        Returns:
+            Cached confusion matrices per category, or None if the file, its ground truth or the settings changed
+        """
+        entry = self.entries.get(file_name)
+        if entry and entry['sha256'] == file_hash and entry['gt_sha256'] == gt_hash and key in entry['matrices']:
+            self.hits += 1
+            return entry['matrices'][key]
+        self.misses += 1
+        return None
+
+    def store(
+        self,
+        file_name: str,
+        file_hash: str,
+        gt_hash: str,
+        key: str,
+        matrices: Dict[str, Dict[str, int]]
+    ) -> None:
+        """
+        Record the confusion matrices of a subject file, dropping results of an older version of it.
+        Args:
+            file_name: Subject file name within the run folder
+            file_hash: Hash of the scored file
+            gt_hash: Hash of the subject's ground truth
+            key: Evaluation settings key f"{method}:{backend}@{threshold}", e.g. 'exhaustive:compat@50'
+            matrices: Confusion matrices per category
+        """
+        entry = self.entries.get(file_name)
+        if not entry or entry['sha256'] != file_hash or entry['gt_sha256'] != gt_hash:
+            entry = {'sha256': file_hash, 'gt_sha256': gt_hash, 'matrices': {}}
+            self.entries[file_name] = entry
+        entry['matrices'][key] = matrices
+
+    def prune(self, file_names: Iterable[str]) -> None:
+        """
+        Forget files that are no longer in the run folder.
+        Args:
+            file_names: File names currently in the run folder
+        """
+        present = set(file_names)
+        for file_name in [a for a in self.entries if a not in present]:
+            del self.entries[file_name]
+
+    def save(self) -> None:
+        """
+        Write the manifest atomically, so a concurrent reader never sees a partial file.
+        """
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,143 @@
+from typing import Dict, List, Any, Optional, Iterable
+from src.experts import process_entry
+from tqdm import tqdm
+import asyncio
+import time
+import os
+
+approaches = {'experts', 'reflexion', 'retrieval'}
+orderings = {'corpus', 'longest_first'}
+
+
+def output_file(run_id: str, subject_code: str) -> str:
+    """
+    Args:
+        run_id: Run folder name within ai_json_output.
+        subject_code: Subject code of an entry.
+    Returns:
+        Path of the entry's output file.
+    """
+    return os.path.join("ai_json_output", run_id, f"{subject_code}.json")
+
+
+async def run_approach(
+    entry: Dict[str, Any],
+    approach: str,
+    run_id: str,
+    model_name: str,
+    temp: float | None,
+    runs: int = 3,
+    source_run_id: Optional[str] = None,
+    max_calls_per_entry: Optional[int] = None,
+    reflexion_history: str = 'full',
+    reflexion_revise: str = 'llm',
+    reflexion_gate: Optional[float] = None
+) -> None:
+    """
+    Run one entry through an approach.
+    Args:
+        entry: Human coding entry with transcript
+        approach: 'experts', 'reflexion' or 'retrieval' (reflexion with reference retrieval)
+        run_id: Output run folder name
+        model_name: Model to call
+        temp: Sampling temperature
+        runs: Sampling repetitions of the experts approach (default: 3)
+        source_run_id: Run folder with the initial expert outputs the reflexion approaches start from
+        max_calls_per_entry: Concurrent calls within one experts entry (default: None, no per-entry limit)
+        reflexion_history: History sent with reflexion calls, 'full', 'latest' or 'summary' (default: 'full')
+        reflexion_revise: How reflexion applies reviews, 'llm' or 'local' (default: 'llm')
+        reflexion_gate: Disagreement threshold above which a topic is reflected on (default: None, every topic)
+    """
+    if approach == 'experts':
+        await process_entry(entry, run_id, model_name, temp, output_file(run_id, entry['subject_code']), runs, max_calls_per_entry)
+    else:
+        # Imported here so expert-only runs do not load the reflexion stack
+        from src.reflexion import process_entry_with_reflect
+        await process_entry_with_reflect(entry, run_id, model_name, temp, approach == 'retrieval', source_run_id, reflexion_history, reflexion_revise, reflexion_gate)
+
+
+async def run_corpus(
+    human_coding_with_transcript: Iterable[Dict[str, Any]],
+    approach: str,
+    run_id: str,
+    model_name: str,
+    temp: float | None,
+    max_in_flight: int = 8,
+    runs: int = 3,
+    source_run_id: Optional[str] = None,
+    order: str = 'longest_first',
+    progress: bool = True,
+    max_calls_per_entry: Optional[int] = None,
+    reflexion_history: str = 'full',
+    reflexion_revise: str = 'llm',
+    reflexion_gate: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run a whole corpus through an approach, keeping up to max_in_flight entries in flight through a work queue.
+    Entries whose output file already exists are skipped, so an interrupted run can be resumed.
+    Per-call rate limits are enforced by the shared scheduler in src.completions.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        approach: 'experts', 'reflexion' or 'retrieval'
+        run_id: Output run folder name
+        model_name: Model to call
+        temp: Sampling temperature
+        max_in_flight: Number of entries processed concurrently (default: 8)
+        runs: Sampling repetitions of the experts approach (default: 3)
+        source_run_id: Run folder with the initial expert outputs, for the reflexion approaches
+        order: 'longest_first' starts the longest transcripts first to shorten the makespan,
+            'corpus' keeps the corpus order (default: 'longest_first')
+        progress: If True, show a progress bar (default: True)
+        max_calls_per_entry: Concurrent calls within one experts entry (default: None, no per-entry limit)
+        reflexion_history: History sent with reflexion calls, 'full', 'latest' or 'summary' (default: 'full')
+        reflexion_revise: How reflexion applies reviews, 'llm' or 'local' (default: 'llm')
+        reflexion_gate: Disagreement threshold above which a topic is reflected on (default: None, every topic)
+    Returns:
+        Dictionary with the completed, skipped and failed subject codes and the wall time in seconds
+    Raises:
+        ValueError: If approach or order is unknown.
+    """
+    if approach not in approaches:
+        raise ValueError(f"Unknown approach {approach!r}, expected one of {sorted(approaches)}")
+    if order not in orderings:
+        raise ValueError(f"Unknown order {order!r}, expected one of {sorted(orderings)}")
+
+    entries = list(human_coding_with_transcript)
+    skipped = [e['subject_code'] for e in entries if os.path.exists(output_file(run_id, e['subject_code']))]
+    pending = [e for e in entries if not os.path.exists(output_file(run_id, e['subject_code']))]
+    if order == 'longest_first':
+        pending.sort(key=lambda e: len(e['transcript']), reverse=True)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for entry in pending:
+        queue.put_nowait(entry)
+
+    completed: List[str] = []
+    failed: List[str] = []
+    bar = tqdm(total=len(pending), desc=run_id, disable=not progress)
+
+    async def worker() -> None:
+        while True:
+            try:
+                entry = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await run_approach(entry, approach, run_id, model_name, temp, runs, source_run_id, max_calls_per_entry, reflexion_history, reflexion_revise, reflexion_gate)
+                completed.append(entry['subject_code'])
+            except Exception as e:
+                print(f"Error processing {entry['subject_code']}: {e}")
+                failed.append(entry['subject_code'])
+            finally:
+                bar.update(1)
+                queue.task_done()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, min(max_in_flight, len(pending))))])
+    bar.close()
+    return {
+        "completed": completed,
+        "skipped": skipped,
+        "failed": failed,
+        "wall_s": round(time.perf_counter() - start, 2),
+    }
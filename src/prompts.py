@@ -0,0 +1,178 @@
+from typing import Dict, List, Any, Optional, Tuple, Type
+from dataclasses import dataclass
+from functools import lru_cache
+from definitions.coding_manuals import system_manual, system_prompt_topic
+from definitions.instructions import inference_instructions_topic
+from definitions.models import AttributionResponse, ReviewResponse, reduce_model_to_field
+from pydantic import BaseModel
+
+
+def _resolve_ref(root: Dict[str, Any], ref: str) -> Dict[str, Any]:
+    """
+    Args:
+        root: Root JSON schema
+        ref: Local reference such as '#/$defs/Attribution'
+    Returns:
+        Referenced sub-schema
+    Raises:
+        ValueError: If ref is not a local reference.
+    """
+    if not ref.startswith("#/"):
+        raise ValueError(f"{ref} is not a local $ref, expected it to start with '#/'")
+    resolved = root
+    for key in ref[2:].split("/"):
+        resolved = resolved[key]
+    return resolved
+
+
+def strict_json_schema(schema: Dict[str, Any], root: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Make a JSON schema conform to OpenAI strict structured outputs, in place: objects forbid additional
+    properties and require every property, single-entry allOf and $ref with sibling keys are inlined,
+    and None defaults are dropped. Mirrors the transform applied by chat.completions.parse.
+    Args:
+        schema: JSON schema, e.g. from BaseModel.model_json_schema()
+        root: Root schema that $ref paths resolve against (default: schema itself)
+    Returns:
+        The strict schema
+    """
+    root = schema if root is None else root
+    for defs_key in ("$defs", "definitions"):
+        for definition in schema.get(defs_key, {}).values():
+            strict_json_schema(definition, root)
+
+    if schema.get("type") == "object" and "additionalProperties" not in schema:
+        schema["additionalProperties"] = False
+    properties = schema.get("properties")
+    if isinstance(properties, dict):
+        schema["required"] = list(properties)
+        schema["properties"] = {key: strict_json_schema(prop, root) for key, prop in properties.items()}
+    if isinstance(schema.get("items"), dict):
+        schema["items"] = strict_json_schema(schema["items"], root)
+    if isinstance(schema.get("anyOf"), list):
+        schema["anyOf"] = [strict_json_schema(variant, root) for variant in schema["anyOf"]]
+    all_of = schema.get("allOf")
+    if isinstance(all_of, list):
+        if len(all_of) == 1:
+            schema.update(strict_json_schema(all_of[0], root))
+            schema.pop("allOf")
+        else:
+            schema["allOf"] = [strict_json_schema(entry, root) for entry in all_of]
+    if "default" in schema and schema["default"] is None:
+        schema.pop("default")
+
+    # A $ref cannot carry sibling keys such as a description, so it is inlined; the schema's own keys win
+    ref = schema.get("$ref")
+    if ref and len(schema) > 1:
+        schema.update({**_resolve_ref(root, ref), **schema})
+        schema.pop("$ref")
+        return strict_json_schema(schema, root)
+    return schema
+
+
+@lru_cache(maxsize=64)
+def response_format_param(response_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Serialize a response model to the strict json_schema response_format sent by chat.completions.parse.
+    Args:
+        response_model: Pydantic model of the structured output
+    Returns:
+        response_format dictionary
+    """
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "schema": strict_json_schema(response_model.model_json_schema()),
+            "name": response_model.__name__,
+            "strict": True,
+        },
+    }
+
+
+@dataclass(frozen=True)
+class TopicPrompt:
+    """
+    Prompt texts and response schema of one attribution topic.
+    """
+    topic: str
+    system_prompt: str
+    # Full content of the instructions message, including the 'INSTRUCTIONS: ' prefix
+    instructions: str
+    response_model: Type[BaseModel]
+    response_format: Dict[str, Any]
+    # Attribution categories of the topic, e.g. Stable_Unchangeable and Fluctuate_Changeable
+    subcategories: Tuple[str, ...]
+
+
+def build_registry() -> Dict[str, TopicPrompt]:
+    """
+    Build the prompts and response schemas of every topic in system_manual.
+    Returns:
+        Dictionary mapping topics to TopicPrompt
+    """
+    registry: Dict[str, TopicPrompt] = {}
+    for topic in system_manual:
+        response_model = reduce_model_to_field(AttributionResponse, topic)
+        registry[topic] = TopicPrompt(
+            topic=topic,
+            system_prompt=system_prompt_topic(topic),
+            instructions="INSTRUCTIONS: " + inference_instructions_topic(topic),
+            response_model=response_model,
+            response_format=response_format_param(response_model),
+            subcategories=tuple(AttributionResponse.model_fields[topic].annotation.model_fields),
+        )
+    return registry
+
+
+# Built once per process and shared by the expert and reflexion pipelines
+topic_prompts: Dict[str, TopicPrompt] = build_registry()
+review_response_format: Dict[str, Any] = response_format_param(ReviewResponse)
+
+
+def expert_messages(topic: str, transcript: str) -> List[Dict[str, str]]:
+    """
+    Build the messages of an expert call.
+    Args:
+        topic: Attribution topic
+        transcript: Interview transcript
+    Returns:
+        System prompt, transcript and instructions messages
+    """
+    return [
+        {
+            "role": "system",
+            "content": topic_prompts[topic].system_prompt,
+        },
+        {"role": "user", "content": f"Test Case Interview Transcript: \n{transcript}"},
+        {"role": "user", "content": topic_prompts[topic].instructions},
+    ]
+
+
+def completion_params(
+    model_name: str,
+    messages: List[Dict[str, str]],
+    response_format: Type[BaseModel] | Dict[str, Any],
+    temp: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Build the chat completion request body used by every pipeline.
+    Args:
+        model_name: Model to call
+        messages: Chat messages
+        response_format: Pydantic model of the structured output, or its precomputed response_format_param
+        temp: Sampling temperature, or None to use the model default
+    Returns:
+        Request parameters
+    """
+    params: Dict[str, Any] = {
+        "model": model_name,
+        "messages": messages,
+        "response_format": response_format if isinstance(response_format, dict) else response_format_param(response_format),
+        "top_p": 1,
+        "presence_penalty": 0,
+        "frequency_penalty": 0,
+        "seed": 42,
+    }
+    if temp is not None:
+        params["temperature"] = temp
+    return params
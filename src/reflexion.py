@@ -1,17 +1,166 @@
 
-from definitions.coding_manuals import system_manual, system_prompt_topic
-from definitions.instructions import inference_instructions_topic
-from src.utils import consolidate_reasoning_chain
-from src.dependencies import client
+from definitions.coding_manuals import system_manual
+from src.prompts import topic_prompts, review_response_format
+from src.utils import consolidate_reasoning_chain, normalize
+from src.completions import parse_completion, estimate_tokens
+from src.journal import EntryJournal
+from src.telemetry import tagged
+from src.gating import gate_topics, save_gating
+from rapidfuzz import fuzz
 import asyncio
-from definitions.models import AttributionResponse, ReviewResponse, reduce_model_to_field
 import json
 import os
-from src.with_retrieval import get_closest_3
 
 
 topics = list(system_manual.keys())
 
+history_modes = {'full', 'latest', 'summary'}
+revise_modes = {'llm', 'local'}
+
+# Minimum fuzzy match score for applying a review item whose quote differs from the transcript or analysis
+QUOTE_MATCH_THRESHOLD = 90
+
+
+def locate_quote(quote: str, transcript: str, threshold: int = QUOTE_MATCH_THRESHOLD) -> str | None:
+    """
+    Check a quote against the transcript.
+    Args:
+        quote: Quoted statement
+        transcript: Interview transcript
+        threshold: Minimum partial_ratio of a quote not found verbatim
+    Returns:
+        The transcript span matching the quote, verbatim or at threshold, else None
+    """
+    norm_quote = normalize(quote)
+    if not norm_quote:
+        return None
+    lowered = transcript.lower()
+    # Spans of the lowered transcript only map back if lowering kept its length
+    if len(lowered) != len(transcript):
+        return quote.strip() if norm_quote in lowered else None
+    start = lowered.find(norm_quote)
+    if start >= 0:
+        return transcript[start:start + len(norm_quote)]
+    alignment = fuzz.partial_ratio_alignment(norm_quote, lowered, score_cutoff=threshold)
+    if alignment is None:
+        return None
+    return transcript[alignment.dest_start:alignment.dest_end].strip()
+
+
+def apply_review(
+    analysis: dict,
+    items: list[dict],
+    topic: str,
+    transcript: str,
+    threshold: int = QUOTE_MATCH_THRESHOLD
+) -> tuple[dict, list[dict]]:
+    """
+    Apply review items to an attribution analysis without an LLM call.
+    Missing quotes found in the transcript are added to their category with the review's reasoning, and superfluous
+    quotes are removed from theirs when equal to a kept quote once normalized, or matching it with a full-string ratio
+    of at least threshold. Items naming a category of another topic are ignored, as the revision of this
+    topic cannot act on them either.
+    Args:
+        analysis: Attribution categories of the topic mapped to their items
+        items: Review items (category, critique, quoted_statement, reasoning)
+        topic: Attribution topic
+        transcript: Interview transcript
+        threshold: Minimum fuzzy match score, see locate_quote
+    Returns:
+        Revised analysis, and the review items that could not be applied
+    """
+    revised = {subcat: list(analysis.get(subcat, [])) for subcat in topic_prompts[topic].subcategories}
+    unresolved = []
+    for item in items:
+        if item['category'] not in revised:
+            continue
+        kept = revised[item['category']]
+        norm_quote = normalize(item['quoted_statement'])
+
+        if item['critique'] == 'missing':
+            if any(norm_quote in normalize(existing['quoted_statement']) for existing in kept):
+                continue
+            quote = locate_quote(item['quoted_statement'], transcript, threshold)
+            if quote is None:
+                unresolved.append(item)
+                continue
+            # A longer quote replaces the ones it contains, as in deduplicate_attribution_entries
+            norm_located = normalize(quote)
+            revised[item['category']] = [existing for existing in kept if normalize(existing['quoted_statement']) not in norm_located]
+            revised[item['category']].append({"quoted_statement": quote, "reasoning": item['reasoning']})
+        else:
+            # Only the flagged quote itself goes: a longer quote merely containing it may still be right
+            remaining = [
+                existing for existing in kept
+                if normalize(existing['quoted_statement']) != norm_quote
+                and fuzz.ratio(norm_quote, normalize(existing['quoted_statement'])) < threshold
+            ]
+            if len(remaining) == len(kept):
+                unresolved.append(item)
+            revised[item['category']] = remaining
+    return revised, unresolved
+
+
+def summarize_reviews(reviews: list[tuple[int, str]]) -> str:
+    """
+    Summarize earlier review rounds from their structured review items, without an LLM call.
+    Args:
+        reviews: (round, review JSON) of each earlier round
+    Returns:
+        Summary message content
+    """
+    lines = ["Summary of earlier review rounds:"]
+    for round_number, review in reviews:
+        items = json.loads(review).get('reviews') or []
+        missing = sum(item['critique'] == 'missing' for item in items)
+        lines.append(f"Round {round_number}: {missing} missing, {len(items) - missing} superfluous")
+        lines += [f"- {item['critique']} {item['category']}: \"{item['quoted_statement']}\"" for item in items]
+    return "\n".join(lines)
+
+
+async def journaled_completion(
+    journal: EntryJournal | None,
+    topic: str,
+    round: int,
+    step: str,
+    model_name: str,
+    messages: list[dict],
+    response_format: dict,
+    temp: float
+) -> str:
+    """
+    Return the journaled content of a reflexion call, or run the call and journal its content.
+    """
+    if journal is not None:
+        content = journal.get(0, topic, round, step)
+        if content is not None:
+            return content
+    with tagged(topic=topic, round=round, step=step):
+        content = await parse_completion(model_name, messages, response_format, temp)
+    if journal is not None:
+        journal.append(0, topic, round, step, content)
+    return content
+
+def topic_state(journal: EntryJournal, topic: str) -> tuple[str, int]:
+    """
+    Reflexion state of a topic, from the transitions recorded in its journal:
+    initial -> reviewed(1) -> revised(1) -> reviewed(2) -> ... -> converged.
+    Args:
+        journal: Journal of the entry
+        topic: Attribution topic
+    Returns:
+        State ('initial', 'reviewed', 'revised' or 'converged') and its round; the round of a converged topic is
+        that of its final analysis
+    """
+    converged = journal.get(0, topic, 0, 'converged')
+    if converged is not None:
+        return 'converged', json.loads(converged)['round']
+    transitions = [(round, step == 'revise') for (_, t, round, step) in journal.records if t == topic and round > 0]
+    if not transitions:
+        return 'initial', 0
+    round, revised = max(transitions)
+    return ('revised' if revised else 'reviewed'), round
+
 # ---- Async logic to run per topic ----
 async def run_topic_reflect_inference(
     topic: str,
@@ -21,16 +170,39 @@ async def run_topic_reflect_inference(
     model_name: str,
     temp: float,
     add_references: bool,
-    runs: int = 3
+    runs: int = 3,
+    journal: EntryJournal | None = None,
+    history: str = 'full',
+    revise: str = 'llm'
 ) -> dict:
     """
     Run reflection-based inference for a single topic, with optional reference retrieval and multiple rounds of review/revision.
+    If a journal is given, the topic is run as a state machine persisted in it: every review (reviewed(n)) and
+    revision (revised(n)) is journaled as it completes, and the final result and conversation once the topic
+    converges. A restart replays the completed rounds and returns a converged topic without recomputing it.
+    history sets what each call is sent besides the fixed prefix (manual, transcript, instructions, references):
+    'full' the whole conversation so far, 'latest' only the latest analysis and latest review, 'summary' the
+    latest analysis with a summary of the earlier reviews. The full conversation is kept for the reflection file
+    either way, and the estimated prompt tokens saved are recorded with each call's telemetry.
+    revise 'llm' regenerates the analysis with an LLM call after each review, 'local' applies the review items to
+    the analysis directly (see apply_review) and only calls the LLM for the items it could not apply.
     Returns the final parsed JSON response as a dictionary.
     """
+    if history not in history_modes:
+        raise ValueError(f"Unknown history mode {history!r}, expected one of {sorted(history_modes)}")
+    if revise not in revise_modes:
+        raise ValueError(f"Unknown revise mode {revise!r}, expected one of {sorted(revise_modes)}")
+    if journal is not None:
+        converged = journal.get(0, topic, 0, 'converged')
+        if converged is not None:
+            state = json.loads(converged)
+            base_messages_instance[topic] = state['messages']
+            return state['result']
+
     base_messages = [
         {
             "role": "system",
-            "content": system_prompt_topic(topic)
+            "content": topic_prompts[topic].system_prompt
         },
         {
             "role": "user",
@@ -38,22 +210,46 @@ async def run_topic_reflect_inference(
         },
         {
             "role": "user",
-            "content": "INSTRUCTIONS: " + inference_instructions_topic(topic)
+            "content": topic_prompts[topic].instructions
         }
     ]
 
+    analysis = consolidate_reasoning_chain(initial_response)[topic]
     base_messages.append({
         "role": "assistant",
-        "content": f"Attribution Analysis (round 1):\n{consolidate_reasoning_chain(initial_response)[topic]}"
+        "content": f"Attribution Analysis (round 1):\n{analysis}"
     })
 
     counter = 1
+    fixed_prefix = base_messages[:3]
 
     if add_references:
+        # Imported on first use: src.with_retrieval needs chromadb and embeds the corpus at import
+        from src.with_retrieval import get_closest_3
         base_messages.append({
             "role": "user",
-            "content": get_closest_3(id, topic, top_n=3)
+            "content": get_closest_3(entry['subject_code'], topic, top_n=3)
         })
+        fixed_prefix.append(base_messages[-1])
+
+    latest_analysis = 3
+    previous_review = None
+    earlier_reviews: list[tuple[int, str]] = []
+
+    def prompt_messages() -> list[dict]:
+        if history == 'full':
+            return base_messages
+        tail = [m for m in base_messages[latest_analysis:] if m not in fixed_prefix]
+        if history == 'summary':
+            earlier = [{"role": "user", "content": summarize_reviews(earlier_reviews)}] if earlier_reviews else []
+        else:
+            earlier = [previous_review] if previous_review else []
+        return fixed_prefix + earlier + tail
+
+    async def reflect_call(step: str, response_format: dict) -> str:
+        messages = prompt_messages()
+        with tagged(prompt_tokens_saved=estimate_tokens(base_messages) - estimate_tokens(messages)):
+            return await journaled_completion(journal, topic, counter, step, model_name, messages, response_format, temp)
 
 
     # Step 2+: Reflection cycles
@@ -68,75 +264,84 @@ Review Attribution Analysis (round {counter}) per the PASS manual.
 """
         })
 
-        def review_response():
-            return client.chat.completions.parse(
-                model=model_name,
-                messages=base_messages,
-                response_format=ReviewResponse,
-                temperature=temp,
-                top_p=1,
-                presence_penalty=0,
-                frequency_penalty=0,
-                seed=42,
-            )
-
-        review = await asyncio.to_thread(review_response)
+        review = await reflect_call('review', review_response_format)
 
 
         base_messages.append({
             "role": "assistant",
-            "content": f"Review of Attribution Analysis (round {counter}):\n{review.choices[0].message.content}"
+            "content": f"Review of Attribution Analysis (round {counter}):\n{review}"
         })
 
-        if json.loads(review.choices[0].message.content)['reviews'] is None:
-            base_messages.append({
-            "role": "assistant",
-            "content": f"Review of Attribution Analysis (round {counter}):\n"+ "{\"reviews\":[]}"
-        })
-            break
-        elif len(json.loads(review.choices[0].message.content)['reviews'])==0:
-            base_messages.append({
+        # The full history keeps its original record, which repeats an empty review
+        if json.loads(review)['reviews'] is None:
+            if history == 'full':
+                base_messages.append({
                 "role": "assistant",
-                "content": f"Review of Attribution Analysis (round {counter}):\n{review.choices[0].message.content}"
+                "content": f"Review of Attribution Analysis (round {counter}):\n"+ "{\"reviews\":[]}"
             })
             break
+        elif len(json.loads(review)['reviews'])==0:
+            if history == 'full':
+                base_messages.append({
+                    "role": "assistant",
+                    "content": f"Review of Attribution Analysis (round {counter}):\n{review}"
+                })
+            break
+        review_message = base_messages[-1]
 
-        base_messages.append({
-            "role": "user",
-            "content": f"""
+        unresolved = json.loads(review)['reviews']
+        if revise == 'local':
+            analysis, unresolved = apply_review(analysis, unresolved, topic, entry['transcript'])
+
+        if not unresolved:
+            completion = json.dumps({topic: analysis}, ensure_ascii=False)
+            if journal is not None and journal.get(0, topic, counter, 'revise') is None:
+                journal.append(0, topic, counter, 'revise', completion)
+        else:
+            if revise == 'local':
+                base_messages.append({
+                    "role": "user",
+                    "content": f"""
+Revise Attribution Analysis (round {counter}) using the remaining feedback below. The other review items are already applied to this analysis:
+{json.dumps({topic: analysis}, ensure_ascii=False)}
+Remaining feedback:
+{json.dumps(unresolved, ensure_ascii=False)}
+- If feedback is valid, update attributions.
+- If not valid, explain why in 'reasoning'.
+"""
+                })
+            else:
+                base_messages.append({
+                    "role": "user",
+                    "content": f"""
 Revise Attribution Analysis (round {counter}) using feedback in the review.
 - If feedback is valid, update attributions.
 - If not valid, explain why in 'reasoning'.
 """
-        })
+                })
 
-        def revise_response():
-            return client.chat.completions.parse(
-                model=model_name,
-                messages=base_messages,
-                response_format=reduce_model_to_field(AttributionResponse, topic),
-                temperature=temp,
-                top_p=1,
-                presence_penalty=0,
-                frequency_penalty=0,
-                seed=42,
-            )
-
-        completion = await asyncio.to_thread(revise_response)
+            completion = await reflect_call('revise', topic_prompts[topic].response_format)
+            if revise == 'local':
+                analysis = json.loads(completion)[topic]
         base_messages.append({
             "role": "assistant",
-            "content": f"Attribution Analysis (round {counter + 1}):\n{completion.choices[0].message.content}"
+            "content": f"Attribution Analysis (round {counter + 1}):\n{completion}"
         })
+        latest_analysis = len(base_messages) - 1
+        previous_review = review_message
+        earlier_reviews.append((counter, review))
 
         counter += 1
-        await asyncio.sleep(1)
 
     base_messages_instance[topic] = base_messages
 
     try:
-        return json.loads(completion.choices[0].message.content)
+        result = json.loads(completion)
     except:
-        return {topic: consolidate_reasoning_chain(initial_response)[topic]}
+        result = {topic: consolidate_reasoning_chain(initial_response)[topic]}
+    if journal is not None:
+        journal.append(0, topic, 0, 'converged', json.dumps({"round": counter, "result": result, "messages": base_messages}, ensure_ascii=False))
+    return result
 
 # ---- Async loop over entries and runs ----
 async def process_entry_with_reflect(
@@ -144,41 +349,60 @@ async def process_entry_with_reflect(
     run_id: str,
     model_name: str,
     temp: float,
-    add_references: bool
+    add_references: bool,
+    source_run_id: str | None = None,
+    history: str = 'full',
+    revise: str = 'llm',
+    gate: float | None = None
 ) -> None:
     """
     Run reflection-based inference for all topics for a given entry and save results to file.
+    The state of every topic is journaled after each transition, so a restarted entry resumes from the last completed
+    round of each topic; an entry whose output file exists is skipped before its input is read.
+    The initial expert outputs are read from ai_json_output/<source_run_id>, or from the run's own folder if not given.
+    history selects the reflexion history sent with each call: 'full', 'latest' or 'summary', and revise how reviews are
+    applied: 'llm' or 'local' (see run_topic_reflect_inference).
+    If gate is given, only topics whose initial runs disagree by more than gate are reflected on (see gate_topics);
+    the others keep their consolidated initial analysis, and the decisions are saved to <run_id>/gating/<subject>.json.
     """
     file_name = f"{entry['subject_code']}.json"
     file_folder = f"ai_json_output/{run_id}"
-    os.makedirs(file_folder, exist_ok=True)
+    source_folder = f"ai_json_output/{source_run_id or run_id}"
     file_path = os.path.join(file_folder, file_name)
     file_path_reflection = os.path.join(file_folder, f"reflection/reflection_{file_name}")
 
-    with open(f"{file_folder}/{file_name}", "r", encoding="utf-8") as f:
-        initial_response = json.load(f)
-
-    class BaseMessages:
-        def __init__(self, topic, messages):
-            self.topic = topic
-            self.messages = messages
-
     if os.path.exists(file_path):
         print(f"Skipping {file_name}, already exists.")
         return
 
+    os.makedirs(os.path.join(file_folder, "reflection"), exist_ok=True)
+    with open(f"{source_folder}/{file_name}", "r", encoding="utf-8") as f:
+        initial_response = json.load(f)
+
+    journal = EntryJournal(run_id, entry['subject_code'])
+    if journal.replayed:
+        states = {topic: topic_state(journal, topic) for topic in topics}
+        print(f"Resuming {file_name} from " + ", ".join(f"{topic} {state}({round})" for topic, (state, round) in states.items()))
+
+    reflect_topics = topics
+    if gate is not None:
+        decisions = gate_topics(initial_response, gate)
+        save_gating(run_id, entry['subject_code'], gate, decisions)
+        reflect_topics = [topic for topic in topics if decisions[topic]['reflect']]
+
     compiled = []
     base_messages_instance = {} 
-    tasks = [run_topic_reflect_inference(topic, initial_response, entry, base_messages_instance, model_name, temp, add_references) for topic in topics]
-    results = await asyncio.gather(*tasks)
+    tasks = [run_topic_reflect_inference(topic, initial_response, entry, base_messages_instance, model_name, temp, add_references, journal=journal, history=history, revise=revise) for topic in reflect_topics]
+    with tagged(run_id=run_id, subject=entry['subject_code']):
+        results = dict(zip(reflect_topics, await asyncio.gather(*tasks)))
+    consolidated = consolidate_reasoning_chain(initial_response)
     this_run = {}
-    [this_run.update(result) for result in results]
+    [this_run.update(results[topic] if topic in results else {topic: consolidated.get(topic, {})}) for topic in topics]
     #print(f"Run {run_index + 1} for {entry['subject_code']} completed.")
     compiled.append(this_run)
-    await asyncio.sleep(1)
 
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(compiled, f, indent=2, ensure_ascii=False)
     with open(file_path_reflection, "w", encoding="utf-8") as f:
         json.dump(base_messages_instance, f, indent=2, ensure_ascii=False)
-        await asyncio.sleep(10)
+    journal.discard()
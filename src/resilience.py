@@ -0,0 +1,179 @@
+from typing import Dict, Optional, Callable, Awaitable, TypeVar
+from collections import deque
+from src.scheduler import retry_after_seconds
+import asyncio
+import random
+import time
+
+T = TypeVar("T")
+
+
+def error_class(e: Exception) -> str:
+    """
+    Classify an exception raised by a completion call.
+    Args:
+        e: Exception
+    Returns:
+        'rate_limit', 'server', 'timeout' or 'connection' for transient errors, otherwise 'client' for
+        other HTTP errors and the exception type name for everything else
+    """
+    status = getattr(e, "status_code", None)
+    if status == 429:
+        return 'rate_limit'
+    if status is not None:
+        return 'server' if status >= 500 or status in (408, 409) else 'client'
+    name = type(e).__name__
+    if name == 'APITimeoutError' or isinstance(e, (asyncio.TimeoutError, TimeoutError)):
+        return 'timeout'
+    if name == 'APIConnectionError' or isinstance(e, ConnectionError):
+        return 'connection'
+    return name
+
+
+transient_errors = {'rate_limit', 'server', 'timeout', 'connection'}
+
+
+def retry_after(e: Exception) -> Optional[float]:
+    """
+    Args:
+        e: Exception raised by a completion call.
+    Returns:
+        Seconds requested by the retry-after-ms or retry-after header of its response, if any.
+    """
+    return retry_after_seconds(getattr(getattr(e, "response", None), "headers", None))
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker. Opens when the share of transient errors among the calls of the last
+    window_s seconds exceeds error_rate, and holds back new dispatch until cooldown_s has passed.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        min_calls: int = 10,
+        window_s: float = 60,
+        cooldown_s: float = 30
+    ) -> None:
+        """
+        Args:
+            error_rate: Error share above which the breaker opens (default: 0.5)
+            min_calls: Calls needed in the window before the breaker can open (default: 10)
+            window_s: Length of the sliding window in seconds (default: 60)
+            cooldown_s: Time the breaker stays open in seconds (default: 30)
+        """
+        self.error_rate: float = error_rate
+        self.min_calls: int = min_calls
+        self.window_s: float = window_s
+        self.cooldown_s: float = cooldown_s
+        self.open_until: float = 0.0
+        self.trips: int = 0
+        self._outcomes: deque = deque()
+
+    def record(self, ok: bool) -> None:
+        """
+        Record the outcome of a call and open the breaker if the error rate spikes.
+        Args:
+            ok: False if the call failed with a transient error
+        """
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and self._outcomes[0][0] < now - self.window_s:
+            self._outcomes.popleft()
+        failures = sum(1 for _, outcome in self._outcomes if not outcome)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) > self.error_rate and now >= self.open_until:
+            self.open_until = now + self.cooldown_s
+            self.trips += 1
+            # Start the next window afresh, so the breaker closes on the first successes after the cooldown
+            self._outcomes.clear()
+
+    async def wait(self) -> None:
+        """
+        Wait while the breaker is open.
+        """
+        while (remaining := self.open_until - time.monotonic()) > 0:
+            await asyncio.sleep(remaining)
+
+
+class Resilience:
+    """
+    Retry layer around completion calls: retries transient errors with exponential backoff and full jitter,
+    honours retry-after, waits on a shared circuit breaker before every attempt and counts errors per class.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        breaker: Optional[CircuitBreaker] = None
+    ) -> None:
+        """
+        Args:
+            max_attempts: Attempts per call, including the first (default: 6)
+            base_delay: Backoff delay before the first retry in seconds (default: 1.0)
+            max_delay: Upper bound of the backoff delay in seconds (default: 60.0)
+            breaker: Circuit breaker shared by all calls (default: a new CircuitBreaker)
+        """
+        self.max_attempts: int = max_attempts
+        self.base_delay: float = base_delay
+        self.max_delay: float = max_delay
+        self.breaker: CircuitBreaker = breaker or CircuitBreaker()
+        self.errors: Dict[str, int] = {}
+        self.retries: int = 0
+        self.failures: int = 0
+
+    def backoff(self, attempt: int, e: Exception) -> float:
+        """
+        Args:
+            attempt: Number of the failed attempt, starting at 1.
+            e: Exception of the failed attempt.
+        Returns:
+            Seconds to wait before the next attempt: full jitter over the exponential delay, at least the retry-after.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        return max(delay, retry_after(e) or 0.0)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a call, retrying transient errors.
+        Args:
+            fn: Function starting the call; invoked again for every attempt
+        Returns:
+            Result of the call
+        Raises:
+            Exception: Non-transient errors immediately, transient ones after max_attempts attempts.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            await self.breaker.wait()
+            try:
+                result = await fn()
+            except Exception as e:
+                kind = error_class(e)
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+                if kind not in transient_errors:
+                    raise
+                self.breaker.record(False)
+                if attempt >= self.max_attempts:
+                    self.failures += 1
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt, e))
+                continue
+            self.breaker.record(True)
+            return result
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns:
+            Dictionary with error counts per class, retries, calls that failed after all attempts and breaker trips.
+        """
+        return {
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "failures": self.failures,
+            "breaker_trips": self.breaker.trips,
+        }
@@ -0,0 +1,245 @@
+from typing import Dict, Optional, Callable, Awaitable, TypeVar, Mapping
+import asyncio
+import time
+import re
+import os
+
+T = TypeVar("T")
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a rate-limit reset or retry-after value into seconds.
+    Args:
+        value: Header value such as '20ms', '1s', '6m0s' or '1.5'
+    Returns:
+        Number of seconds, or None if the value cannot be parsed
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    factors = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * factors[unit] for number, unit in parts)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """
+    Args:
+        headers: Response headers.
+    Returns:
+        Seconds requested by the retry-after-ms or retry-after header, if any.
+    """
+    if not headers:
+        return None
+    if headers.get("retry-after-ms") is not None:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate, with a burst capacity of one minute's worth.
+    """
+
+    def __init__(self, per_minute: float) -> None:
+        """
+        Args:
+            per_minute: Refill rate in tokens per minute
+        """
+        self.max_per_minute: float = per_minute
+        self.per_minute: float = per_minute
+        self.level: float = per_minute
+        self.paused_until: float = 0.0
+        self._updated: float = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.max_per_minute, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Args:
+            amount: Number of tokens wanted.
+        Returns:
+            Seconds to wait until they are available (0 if available now).
+        """
+        self._refill()
+        pause = max(0.0, self.paused_until - time.monotonic())
+        # A request larger than the whole bucket only waits for a full bucket
+        missing = min(amount, self.max_per_minute) - self.level
+        return max(pause, missing * 60 / self.per_minute if missing > 0 else 0.0)
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def cap(self, remaining: float) -> None:
+        """
+        Lower the level to what the server reports as remaining.
+        """
+        self._refill()
+        self.level = min(self.level, remaining)
+
+
+class RateLimitScheduler:
+    """
+    Shared dispatcher for LLM calls. Combines token buckets for requests and tokens per minute with a
+    concurrency semaphore, and adapts to 429 responses and rate-limit headers: a 429 pauses dispatch for
+    the retry-after period and halves the request rate, which then recovers on every success.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200_000,
+        max_concurrency: int = 32,
+        min_rate_fraction: float = 0.05
+    ) -> None:
+        """
+        Args:
+            requests_per_minute: Request rate limit of the account (default: 500)
+            tokens_per_minute: Token rate limit of the account (default: 200,000)
+            max_concurrency: Maximum number of calls in flight (default: 32)
+            min_rate_fraction: Lowest fraction of the configured request rate adaptation may reach (default: 0.05)
+        """
+        self.requests: TokenBucket = TokenBucket(requests_per_minute)
+        self.tokens: TokenBucket = TokenBucket(tokens_per_minute)
+        self.max_concurrency: int = max_concurrency
+        self.min_rate_fraction: float = min_rate_fraction
+        self.stats: Dict[str, int] = {"dispatched": 0, "rate_limited": 0, "in_flight": 0}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def from_env(cls) -> "RateLimitScheduler":
+        """
+        Build a scheduler from OPENAI_RPM, OPENAI_TPM and OPENAI_MAX_CONCURRENCY, with defaults for unset values.
+        Returns:
+            RateLimitScheduler instance
+        """
+        return cls(
+            requests_per_minute=float(os.getenv("OPENAI_RPM", 500)),
+            tokens_per_minute=float(os.getenv("OPENAI_TPM", 200_000)),
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", 32)),
+        )
+
+    def _primitives(self) -> None:
+        # asyncio primitives are bound to one event loop; notebooks start a new loop per asyncio.run
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._lock = asyncio.Lock()
+
+    async def _acquire(self, estimated_tokens: int) -> None:
+        # One waiter at a time, so calls are dispatched in arrival order
+        async with self._lock:
+            while True:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(estimated_tokens)
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]) -> None:
+        """
+        Align the buckets with the x-ratelimit-* headers of a response.
+        Args:
+            headers: Response headers
+        """
+        if not headers:
+            return
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                bucket.cap(float(remaining))
+            except ValueError:
+                continue
+            reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            if float(remaining) <= 0 and reset:
+                bucket.paused_until = max(bucket.paused_until, time.monotonic() + reset)
+
+    def on_rate_limited(self, retry_after: Optional[float]) -> None:
+        """
+        Pause dispatch after a 429, halving the request rate once per congestion event.
+        Args:
+            retry_after: Seconds the server asked to wait, if given
+        """
+        self.stats["rate_limited"] += 1
+        now = time.monotonic()
+        # 429s of calls already in flight during a pause belong to the same congestion event
+        if now >= self.requests.paused_until:
+            floor = self.requests.max_per_minute * self.min_rate_fraction
+            self.requests.per_minute = max(floor, self.requests.per_minute / 2)
+        until = now + (retry_after if retry_after is not None else 1.0)
+        for bucket in (self.requests, self.tokens):
+            bucket.paused_until = max(bucket.paused_until, until)
+
+    def on_success(self) -> None:
+        """
+        Recover the request rate additively after a successful call.
+        """
+        self.requests.per_minute = min(
+            self.requests.max_per_minute,
+            self.requests.per_minute + self.requests.max_per_minute * 0.05
+        )
+
+    def settle(self, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """
+        Correct the token bucket once the real usage of a call is known.
+        Args:
+            estimated_tokens: Tokens taken from the bucket before the call
+            actual_tokens: Tokens reported in the response usage, if any
+        """
+        if actual_tokens is not None:
+            self.tokens.take(actual_tokens - estimated_tokens)
+
+    async def run(
+        self,
+        call: Callable[[], Awaitable[T]],
+        estimated_tokens: int
+    ) -> T:
+        """
+        Dispatch a call once the rate limits allow it. A 429 response adapts the limits and is re-raised;
+        retrying it is left to src.resilience.
+        Args:
+            call: Function starting the call
+            estimated_tokens: Estimated prompt plus completion tokens of the call
+        Returns:
+            Result of the call
+        """
+        self._primitives()
+        async with self._semaphore:
+            await self._acquire(estimated_tokens)
+            self.stats["dispatched"] += 1
+            self.stats["in_flight"] += 1
+            try:
+                result = await call()
+            except Exception as e:
+                # A failed call is not charged against the token limit
+                self.tokens.take(-estimated_tokens)
+                if getattr(e, "status_code", None) == 429:
+                    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+                    self.update_from_headers(headers)
+                    self.on_rate_limited(retry_after_seconds(headers))
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+        self.update_from_headers(getattr(result, "headers", None))
+        self.on_success()
+        return result
@@ -0,0 +1,230 @@
+from typing import Dict, List, Optional, Callable, Tuple
+import hashlib
+import sqlite3
+import os
+
+
+class ScoreCache:
+    """
+    Persistent on-disk cache of fuzzy match scores, keyed by a hash of (scorer, string 1, string 2).
+    Backed by SQLite with least-recently-used eviction once max_entries is exceeded.
+    Writes are batched and committed on flush(), close() or when the context manager exits.
+    Lookups mark scores as used in memory; the LRU order is written back on flush().
+    """
+
+    def __init__(
+        self,
+        path: str = "ai_json_output/score_cache.sqlite",
+        max_entries: int = 1_000_000,
+        flush_every: int = 10_000
+    ) -> None:
+        """
+        Open or create a score cache.
+        Args:
+            path: SQLite database file (default: 'ai_json_output/score_cache.sqlite')
+            max_entries: Maximum number of cached scores kept after eviction (default: 1,000,000)
+            flush_every: Number of writes after which pending changes are committed (default: 10,000)
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path: str = path
+        self.max_entries: int = max_entries
+        self.flush_every: int = flush_every
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._pending: int = 0
+        # Keys looked up since the last flush, mapped to their use tick
+        self._touched: Dict[str, int] = {}
+
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, score REAL NOT NULL, last_used INTEGER NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores (last_used)")
+        self.conn.commit()
+        # Monotonic use counter, so LRU order survives restarts
+        self._tick: int = self.conn.execute("SELECT COALESCE(MAX(last_used), 0) FROM scores").fetchone()[0]
+
+    @staticmethod
+    def key(scorer: str, s1: str, s2: str) -> str:
+        """
+        Build the cache key of a scorer call.
+        Args:
+            scorer: Name of the scoring function
+            s1: First string
+            s2: Second string
+        Returns:
+            Hex digest identifying the call
+        """
+        return hashlib.sha256("\x00".join((scorer, s1, s2)).encode("utf-8")).hexdigest()
+
+    def get(self, scorer: str, s1: str, s2: str) -> Optional[float]:
+        """
+        Look up a cached score and mark it as recently used.
+        Args:
+            scorer: Name of the scoring function
+            s1: First string
+            s2: Second string
+        Returns:
+            Cached score, or None on a miss
+        """
+        return self.get_many(scorer, [(s1, s2)])[0]
+
+    def get_many(self, scorer: str, pairs: List[Tuple[str, str]]) -> List[Optional[float]]:
+        """
+        Look up the cached scores of several calls with one query per chunk, and mark them as recently used.
+        Args:
+            scorer: Name of the scoring function
+            pairs: (string 1, string 2) pairs
+        Returns:
+            Cached score of each pair, or None on a miss
+        """
+        keys = [self.key(scorer, s1, s2) for s1, s2 in pairs]
+        found: Dict[str, float] = {}
+        unique = list(dict.fromkeys(keys))
+        # Stay below SQLite's default limit of 999 bound parameters
+        for start in range(0, len(unique), 900):
+            chunk = unique[start:start + 900]
+            found.update(self.conn.execute(
+                f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall())
+        self._tick += 1
+        for key in found:
+            self._touched[key] = self._tick
+        hits = sum(key in found for key in keys)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return [found.get(key) for key in keys]
+
+    def put(self, scorer: str, s1: str, s2: str, score: float) -> None:
+        """
+        Store a score.
+        Args:
+            scorer: Name of the scoring function
+            s1: First string
+            s2: Second string
+            score: Score to cache
+        """
+        self.put_many(scorer, [(s1, s2)], [score])
+
+    def put_many(self, scorer: str, pairs: List[Tuple[str, str]], scores: List[float]) -> None:
+        """
+        Store several scores in one statement.
+        Args:
+            scorer: Name of the scoring function
+            pairs: (string 1, string 2) pairs
+            scores: Score of each pair
+        """
+        self._tick += 1
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scores (key, score, last_used) VALUES (?, ?, ?)",
+            [(self.key(scorer, s1, s2), score, self._tick) for (s1, s2), score in zip(pairs, scores)]
+        )
+        self._written(len(pairs))
+
+    def get_or_compute(
+        self,
+        scorer: str,
+        fn: Callable[[str, str], float],
+        s1: str,
+        s2: str
+    ) -> float:
+        """
+        Return the cached score of a scorer call, computing and storing it on a miss.
+        Args:
+            scorer: Name of the scoring function
+            fn: Scoring function
+            s1: First string
+            s2: Second string
+        Returns:
+            Score
+        """
+        return self.get_or_compute_many(scorer, fn, [(s1, s2)])[0]
+
+    def get_or_compute_many(
+        self,
+        scorer: str,
+        fn: Callable[[str, str], float],
+        pairs: List[Tuple[str, str]]
+    ) -> List[float]:
+        """
+        Return the cached scores of several scorer calls, computing and storing the missing ones in one batch.
+        Args:
+            scorer: Name of the scoring function
+            fn: Scoring function
+            pairs: (string 1, string 2) pairs
+        Returns:
+            Score of each pair
+        """
+        scores = self.get_many(scorer, pairs)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            computed = [fn(*pairs[i]) for i in missing]
+            for i, score in zip(missing, computed):
+                scores[i] = score
+            self.put_many(scorer, [pairs[i] for i in missing], computed)
+        return scores
+
+    def _written(self, count: int = 1) -> None:
+        self._pending += count
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def evict(self) -> int:
+        """
+        Delete least recently used scores beyond max_entries.
+        Returns:
+            Number of evicted scores
+        """
+        count = self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        self.conn.execute(
+            "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.evictions += excess
+        return excess
+
+    def flush(self) -> None:
+        """
+        Record the use of looked-up scores, evict beyond the size bound and commit pending writes.
+        """
+        if self._touched:
+            self.conn.executemany(
+                "UPDATE scores SET last_used = ? WHERE key = ?",
+                [(tick, key) for key, tick in self._touched.items()]
+            )
+            self._touched = {}
+        self.evict()
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        """
+        Flush and close the database connection.
+        """
+        self.flush()
+        self.conn.close()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dictionary with hits, misses, hit rate, evictions and number of stored scores.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0,
+            "evictions": self.evictions,
+            "entries": self.conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0],
+        }
+
+    def __enter__(self) -> "ScoreCache":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
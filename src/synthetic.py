@@ -0,0 +1,133 @@
+from typing import Dict, List, Any
+from definitions.models import AttributionResponse
+from src.utils import map_label
+import random
+import json
+import os
+
+# Subcategory names of each topic, read off the response model so the shape always matches
+topic_subcategories: Dict[str, List[str]] = {
+    topic: list(field.annotation.model_fields) for topic, field in AttributionResponse.model_fields.items()
+}
+
+_subjects = ["he", "she", "my son", "my daughter", "the child", "our boy", "our girl"]
+_verbs = ["gets", "becomes", "is always", "can be", "has been", "seems", "was never", "is often"]
+_states = ["angry", "upset", "difficult", "aggressive", "calm", "stubborn", "clingy", "loud", "defiant", "happy"]
+_contexts = [
+    "when we ask him to stop", "at school", "with his siblings", "since he was a toddler",
+    "because he is tired", "when things do not go her way", "no matter what we do",
+    "after the medication", "on purpose to annoy us", "without even realising it",
+    "compared to last year", "when she is hungry", "if we take the tablet away",
+]
+_fillers = ["you know", "I think", "honestly", "to be fair", "like", "I mean"]
+
+
+def synthetic_sentence(rng: random.Random) -> str:
+    """
+    Generate one parent-speech style sentence.
+    Args:
+        rng: Seeded random generator
+    Returns:
+        Sentence string
+    """
+    parts = [rng.choice(_subjects), rng.choice(_verbs), rng.choice(_states), rng.choice(_contexts)]
+    if rng.random() < 0.4:
+        parts.insert(0, rng.choice(_fillers) + ",")
+    if rng.random() < 0.3:
+        parts.append("and " + rng.choice(_contexts))
+    sentence = " ".join(parts)
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def _perturb(quote: str, rng: random.Random) -> str:
+    """
+    Perturb a quote the way model outputs differ from the human coding.
+    """
+    r = rng.random()
+    words = quote.split()
+    if r < 0.15 and len(words) > 4:
+        cut = rng.randint(2, len(words) - 2)
+        return " ".join(words[:cut]) + "..." + " ".join(words[cut + 1:])
+    if r < 0.3 and len(words) > 4:
+        return " ".join(words[rng.randint(0, 2):len(words) - rng.randint(0, 2)])
+    if r < 0.4:
+        return quote.lower()
+    return quote
+
+
+def generate_corpus(
+    n_subjects: int = 50,
+    sentences_per_transcript: int = 120,
+    quotes_per_label: int = 3,
+    runs: int = 3,
+    seed: int = 42
+) -> Dict[str, Any]:
+    """
+    Generate a synthetic corpus of transcripts, human codings and AI outputs.
+    Args:
+        n_subjects: Number of subjects (default: 50)
+        sentences_per_transcript: Sentences per transcript (default: 120)
+        quotes_per_label: Average number of quotes per label, for both human and AI codings (default: 3)
+        runs: Number of AI runs per subject (default: 3)
+        seed: Random seed (default: 42)
+    Returns:
+        Dictionary with 'human_coding' (list in the human_coding_with_transcript format) and
+        'ai_outputs' (subject code -> list of AttributionResponse-shaped runs)
+    """
+    rng = random.Random(seed)
+    human_coding: List[Dict[str, Any]] = []
+    ai_outputs: Dict[str, List[Dict[str, Any]]] = {}
+
+    for index in range(n_subjects):
+        subject_code = f"SYN{index:04d}{rng.choice('MF')}"
+        sentences = [synthetic_sentence(rng) for _ in range(sentences_per_transcript)]
+        entry: Dict[str, Any] = {"subject_code": subject_code, "transcript": " ".join(sentences)}
+        for subcats in topic_subcategories.values():
+            for subcat in subcats:
+                k = min(len(sentences), max(0, int(rng.gauss(quotes_per_label, 1))))
+                entry["Human_" + map_label(subcat)[3:]] = rng.sample(sentences, k)
+        human_coding.append(entry)
+
+        subject_runs: List[Dict[str, Any]] = []
+        for _ in range(runs):
+            one_run: Dict[str, Any] = {}
+            for topic, subcats in topic_subcategories.items():
+                one_run[topic] = {}
+                for subcat in subcats:
+                    gt = entry["Human_" + map_label(subcat)[3:]]
+                    # Mostly recover the human quotes, plus some false positives
+                    quotes = [_perturb(q, rng) for q in gt if rng.random() < 0.7]
+                    quotes += [rng.choice(sentences) for _ in range(max(0, int(rng.gauss(quotes_per_label / 3, 1))))]
+                    one_run[topic][subcat] = [
+                        {"quoted_statement": q, "reasoning": f"Meets the {subcat} inclusion criteria."} for q in quotes
+                    ]
+            subject_runs.append(one_run)
+        ai_outputs[subject_code] = subject_runs
+
+    return {"human_coding": human_coding, "ai_outputs": ai_outputs}
+
+
+def write_corpus(
+    corpus: Dict[str, Any],
+    root: str,
+    run_id: str = "synthetic_run"
+) -> Dict[str, str]:
+    """
+    Write a generated corpus in the on-disk layout of data/ and ai_json_output/.
+    Args:
+        corpus: Output of generate_corpus
+        root: Directory to write into
+        run_id: Name of the run folder (default: 'synthetic_run')
+    Returns:
+        Dictionary with the 'human_coding' file path and the 'ai_output_path' run folder
+    """
+    human_path = os.path.join(root, "data", "human_coding", "human_coding_with_transcript.json")
+    run_folder = os.path.join(root, "ai_json_output", run_id)
+    os.makedirs(os.path.dirname(human_path), exist_ok=True)
+    os.makedirs(run_folder, exist_ok=True)
+    with open(human_path, "w", encoding="utf-8") as f:
+        json.dump(corpus["human_coding"], f, indent=2, ensure_ascii=False)
+    for subject_code, runs in corpus["ai_outputs"].items():
+        with open(os.path.join(run_folder, f"{subject_code}.json"), "w", encoding="utf-8") as f:
+            json.dump(runs, f, indent=2, ensure_ascii=False)
+    return {"human_coding": human_path, "ai_output_path": run_folder}
@@ -0,0 +1,164 @@
+from typing import Dict, List, Any, Optional, Iterator
+from dataclasses import dataclass, field, asdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import numpy as np
+import time
+import json
+import os
+
+# Labels of the calls made in the current task, e.g. run_id, subject, topic, round and step.
+# asyncio tasks copy the context when they are created, so labels set around a gather reach every call in it.
+call_context: ContextVar[Dict[str, Any]] = ContextVar("call_context", default={})
+
+
+@contextmanager
+def tagged(**labels: Any) -> Iterator[None]:
+    """
+    Add labels to the telemetry events of every call made inside the block.
+    Args:
+        labels: Labels such as run_id, subject, topic, run_index, round or step
+    """
+    token = call_context.set({**call_context.get(), **labels})
+    try:
+        yield
+    finally:
+        call_context.reset(token)
+
+
+@dataclass
+class CallEvent:
+    """
+    One completion or embedding call.
+    """
+    kind: str
+    model: str
+    latency_s: float
+    run_id: Optional[str] = None
+    subject: Optional[str] = None
+    topic: Optional[str] = None
+    run_index: Optional[int] = None
+    round: Optional[int] = None
+    step: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    # Estimated prompt tokens a compacted reflexion history avoided sending
+    prompt_tokens_saved: int = 0
+    retries: int = 0
+    cache_hit: bool = False
+    error: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+class JsonlSink:
+    """
+    Appends events to a JSONL file.
+    """
+
+    def __init__(self, path: str = "ai_json_output/telemetry.jsonl") -> None:
+        """
+        Args:
+            path: JSONL file (default: 'ai_json_output/telemetry.jsonl')
+        """
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.path: str = path
+
+    def write(self, event: CallEvent) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(event), ensure_ascii=False) + "\n")
+
+
+def _latency(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"p50_s": None, "p99_s": None}
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"p50_s": round(float(p50), 3), "p99_s": round(float(p99), 3)}
+
+
+def _summarize(events: List[CallEvent]) -> Dict[str, Any]:
+    # Latency percentiles only cover calls that reached the API
+    return {
+        "calls": len(events),
+        "cache_hits": sum(e.cache_hit for e in events),
+        "errors": sum(e.error is not None for e in events),
+        "retries": sum(e.retries for e in events),
+        "prompt_tokens": sum(e.prompt_tokens for e in events),
+        "completion_tokens": sum(e.completion_tokens for e in events),
+        "cached_tokens": sum(e.cached_tokens for e in events),
+        "prompt_tokens_saved": sum(e.prompt_tokens_saved for e in events),
+        **_latency([e.latency_s for e in events if not e.cache_hit and e.error is None]),
+    }
+
+
+class Telemetry:
+    """
+    Collects call events in memory and forwards them to the configured sinks.
+    """
+
+    def __init__(self) -> None:
+        self.events: List[CallEvent] = []
+        self.sinks: List[JsonlSink] = []
+
+    def add_sink(self, sink: JsonlSink) -> None:
+        """
+        Args:
+            sink: Sink receiving every subsequent event.
+        """
+        self.sinks.append(sink)
+
+    def record(self, kind: str, model: str, latency_s: float, **values: Any) -> CallEvent:
+        """
+        Record a call, labelled with the current call context.
+        Args:
+            kind: 'chat' or 'embedding'
+            model: Model called
+            latency_s: Wall time of the call including retries, in seconds
+            values: Further CallEvent fields (token counts, retries, cache_hit, error) or labels
+        Returns:
+            The recorded event
+        """
+        labels = {k: v for k, v in call_context.get().items() if k in CallEvent.__dataclass_fields__}
+        event = CallEvent(kind=kind, model=model, latency_s=round(latency_s, 4), **{**labels, **values})
+        self.events.append(event)
+        for sink in self.sinks:
+            sink.write(event)
+        return event
+
+    def clear(self) -> None:
+        """
+        Drop the events held in memory.
+        """
+        self.events = []
+
+    def summary(self, run_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Summarize the recorded events per run_id, with breakdowns per topic, step and round.
+        Args:
+            run_id: Only summarize this run (default: None, all runs)
+        Returns:
+            Dictionary mapping run_id to its summary
+        """
+        runs: Dict[str, List[CallEvent]] = {}
+        for event in self.events:
+            if run_id is None or event.run_id == run_id:
+                runs.setdefault(str(event.run_id), []).append(event)
+
+        report: Dict[str, Any] = {}
+        for one_run, events in runs.items():
+            breakdowns: Dict[str, Dict[str, List[CallEvent]]] = {"by_topic": {}, "by_step": {}, "by_round": {}}
+            for event in events:
+                breakdowns["by_topic"].setdefault(str(event.topic), []).append(event)
+                breakdowns["by_step"].setdefault(f"{event.kind}:{event.step}", []).append(event)
+                breakdowns["by_round"].setdefault(str(event.round), []).append(event)
+            report[one_run] = {
+                **_summarize(events),
+                **{name: {key: _summarize(group) for key, group in groups.items()} for name, groups in breakdowns.items()},
+            }
+        return report
+
+
+# Shared by every call of the process
+telemetry = Telemetry()
@@ -1,9 +1,14 @@
-from typing import Dict, List, Set, Any, Optional, DefaultDict, Tuple
+from typing import Dict, List, Set, Any, Optional, DefaultDict, Tuple, Callable, Iterable, Iterator
 from collections import defaultdict
-from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from itertools import combinations, chain
 from rapidfuzz.fuzz import token_set_ratio
-from fuzzywuzzy import fuzz
+from rapidfuzz import process, fuzz
+from rapidfuzz.distance import Levenshtein, Indel
+from src.score_cache import ScoreCache
+from src.dedup import deduplicate_items_indexed
+from src.manifest import RunManifest
+import numpy as np
 import json
 import os
 
@@ -22,16 +27,25 @@ def normalize(text: str) -> str:
 
 def deduplicate_attribution_entries(
     entries: List[Dict[str, Dict[str, List[Dict[str, Any]]]]],
-    preserve_empty_categories: bool = False
+    preserve_empty_categories: bool = False,
+    engine: str = 'pairwise'
 ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
     """
     Deduplicate attribution entries by quoted statement, keeping the longer version when duplicates are found.
     Args:
         entries: List of nested dictionaries with structure: category -> subcategory -> items
         preserve_empty_categories: If True, ensures all category/subcategory combinations from input appear in output (even if empty)
+        engine: 'pairwise' compares each incoming quote with every kept quote in input order;
+            'indexed' gives the same result but looks the first overlapping kept quote up in substring
+            indexes instead of scanning every kept quote (default: 'pairwise')
     Returns:
         Deduplicated dictionary with unique quoted statements
+    Raises:
+        ValueError: If engine is not a known deduplication engine.
     """
+    if engine not in ('pairwise', 'indexed'):
+        raise ValueError(f"{engine} is not a valid deduplication engine, expected 'pairwise' or 'indexed'")
+
     result: DefaultDict[str, DefaultDict[str, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
     
     # Collect all possible categories and subcategories for structure preservation
@@ -42,6 +56,9 @@ def deduplicate_attribution_entries(
                 for subcat in subcats:
                     all_categories[category].add(subcat)
 
+    # Normalized form of each kept quote, computed once per quote
+    result_norms: DefaultDict[str, DefaultDict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+
     # Process entries and deduplicate
     for entry in entries:
         for category, subcats in entry.items():
@@ -51,15 +68,22 @@ def deduplicate_attribution_entries(
                     norm_quote: str = normalize(quote)
 
                     existing_items: List[Dict[str, Any]] = result[category][subcat]
+                    existing_norms: List[str] = result_norms[category][subcat]
+                    if engine == 'indexed':
+                        # Collect only; deduplicated per subcategory below
+                        existing_items.append(item)
+                        existing_norms.append(norm_quote)
+                        continue
                     replaced: bool = False
                     
                     for i, existing in enumerate(existing_items):
-                        existing_norm: str = normalize(existing['quoted_statement'])
+                        existing_norm: str = existing_norms[i]
 
                         # Keep longer quote when there's containment
                         if existing_norm in norm_quote:
                             if len(quote) > len(existing['quoted_statement']):
                                 existing_items[i] = item
+                                existing_norms[i] = norm_quote
                             replaced = True
                             break
                         elif norm_quote in existing_norm:
@@ -68,6 +92,12 @@ def deduplicate_attribution_entries(
 
                     if not replaced:
                         existing_items.append(item)
+                        existing_norms.append(norm_quote)
+
+    if engine == 'indexed':
+        for category, subcats in result.items():
+            for subcat, items in subcats.items():
+                subcats[subcat] = deduplicate_items_indexed(items, result_norms[category][subcat])
 
     # Ensure all categories/subcategories appear if requested
     if preserve_empty_categories:
@@ -78,30 +108,34 @@ def deduplicate_attribution_entries(
     return {cat: dict(subcats) for cat, subcats in result.items()}
 
 def merge_multiple_ai_runs(
-    inference_runs: List[Dict[str, Dict[str, List[Dict[str, Any]]]]]
+    inference_runs: List[Dict[str, Dict[str, List[Dict[str, Any]]]]],
+    engine: str = 'pairwise'
 ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
     """
     Merge multiple AI inference runs into a single deduplicated result.
     Ensures all category/subcategory combinations from any run appear in the final output.
     Args:
         inference_runs: List of AI inference results to merge
+        engine: Deduplication engine, see deduplicate_attribution_entries (default: 'pairwise')
     Returns:
         Merged and deduplicated attribution dictionary
     """
-    return deduplicate_attribution_entries(inference_runs, preserve_empty_categories=True)
+    return deduplicate_attribution_entries(inference_runs, preserve_empty_categories=True, engine=engine)
 
 def consolidate_reasoning_chain(
-    reasoning_steps: List[Dict[str, Dict[str, List[Dict[str, Any]]]]]
+    reasoning_steps: List[Dict[str, Dict[str, List[Dict[str, Any]]]]],
+    engine: str = 'pairwise'
 ) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
     """
     Consolidate multiple reasoning steps (e.g., initial + refined analysis) into final result.
     Only preserves structure that actually exists in the reasoning chain.
     Args:
         reasoning_steps: List of reasoning steps to consolidate
+        engine: Deduplication engine, see deduplicate_attribution_entries (default: 'pairwise')
     Returns:
         Consolidated attribution dictionary
     """
-    return deduplicate_attribution_entries(reasoning_steps, preserve_empty_categories=False)
+    return deduplicate_attribution_entries(reasoning_steps, preserve_empty_categories=False, engine=engine)
 
 def map_label(key: str) -> str:
     """
@@ -142,10 +176,205 @@ def comparison_mode(
             out_[map_label(kk)] = [a['quoted_statement'] for a in vv]
     return out_
 
+def partial_ratio_compat(s1: str, s2: str, **kwargs: Any) -> int:
+    """
+    fuzzywuzzy's partial_ratio (with python-Levenshtein) rebuilt on rapidfuzz primitives.
+    Returns exactly the scores the published F1 numbers were computed with.
+    Args:
+        s1: First string
+        s2: Second string
+        kwargs: Scorer options passed by rapidfuzz.process.cdist (ignored)
+    Returns:
+        Partial ratio score as an integer between 0 and 100
+    """
+    if s1 == s2:
+        return 100
+    if not s1 or not s2:
+        return 0
+    shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+
+    # The best partial match is block-aligned with one of the matching blocks
+    best: float = 0.0
+    for block in Levenshtein.opcodes(shorter, longer).as_matching_blocks():
+        long_start: int = max(block.b - block.a, 0)
+        r: float = Indel.normalized_similarity(shorter, longer[long_start:long_start + len(shorter)])
+        if r > .995:
+            return 100
+        best = max(best, r)
+    return int(round(100 * best))
+
+scoring_backends: Dict[str, Tuple[str, Callable[..., float]]] = {
+    'compat': ('partial_ratio', partial_ratio_compat),
+    'fast': ('rapidfuzz.partial_ratio', fuzz.partial_ratio),
+}
+
+def _partial_ratio(
+    gt_lower: str,
+    inf_clean: str,
+    threshold: int,
+    backend: str
+) -> float:
+    """
+    Score a GT string against a single INF string with the chosen backend.
+    The score is only exact when it reaches the threshold; scores below it may be reported as 0.
+    Args:
+        gt_lower: Lowercased ground truth string
+        inf_clean: Lowercased inference string with '...' removed
+        threshold: Minimum fuzzy match score
+        backend: 'compat' or 'fast', see scoring_backends
+    Returns:
+        Partial ratio score
+    """
+    if backend == 'fast':
+        return fuzz.partial_ratio(gt_lower, inf_clean, score_cutoff=threshold)
+    # rapidfuzz searches a superset of the compat alignments, so its score bounds the compat score from above
+    if threshold > 0 and fuzz.partial_ratio(gt_lower, inf_clean, score_cutoff=threshold - 0.5 - 1e-6) == 0:
+        return 0
+    return partial_ratio_compat(gt_lower, inf_clean)
+
+def _token_set_ratio(
+    gt_lower: str,
+    combined: str,
+    threshold: int
+) -> float:
+    """
+    Score a GT string against combined INF strings with rapidfuzz token_set_ratio.
+    Args:
+        gt_lower: Lowercased ground truth string
+        combined: Joined lowercased inference strings
+        threshold: Minimum fuzzy match score, used as early-exit cutoff
+    Returns:
+        Token set ratio score, or 0 if below the threshold
+    """
+    return token_set_ratio(gt_lower, combined, score_cutoff=threshold)
+
+def _cached_single_scores(
+    GT_lower: List[str],
+    INF_clean: List[str],
+    cache: ScoreCache
+) -> np.ndarray:
+    """
+    Score every GT/INF pair with partial_ratio_compat through the score cache, in one batched lookup.
+    Only the pure Python compat scorer goes through the cache: the native rapidfuzz scorers are cheaper to
+    recompute than a cache key and lookup.
+    Args:
+        GT_lower: Lowercased ground truth strings
+        INF_clean: Lowercased inference strings with '...' removed
+        cache: Persistent score cache
+    Returns:
+        GT x INF matrix of exact partial ratio scores
+    """
+    scorer, fn = scoring_backends['compat']
+    pairs: List[Tuple[str, str]] = [(gt, inf) for gt in GT_lower for inf in INF_clean]
+    return np.array(cache.get_or_compute_many(scorer, fn, pairs), dtype=np.float64).reshape(len(GT_lower), len(INF_clean))
+
+def _exhaustive_candidates(
+    gt_lower: str,
+    INF_lower: List[str]
+) -> Iterator[Iterable[Tuple[int, ...]]]:
+    """
+    Yield every combination of INF indices, grouped by combination size from 2 upwards.
+    Args:
+        gt_lower: Lowercased ground truth string (unused, kept for a common signature)
+        INF_lower: Lowercased inference strings
+    Returns:
+        Iterator over groups of index combinations, one group per size
+    """
+    inf_indices: List[int] = [i for i in range(len(INF_lower))]
+    for r in range(2, len(inf_indices)+1):
+        yield combinations(inf_indices, r)
+
+def _greedy_span_cover(
+    gt_tokens: List[str],
+    INF_tokens: List[Set[str]]
+) -> List[int]:
+    """
+    Cover the token positions of a ground truth quote with as few inference quotes as possible.
+    Every inference quote is mapped onto the runs of consecutive GT token positions whose tokens
+    it contains, and the classic greedy interval cover is run over those spans. Positions no
+    inference quote can cover are skipped.
+    Args:
+        gt_tokens: Tokens of the lowercased ground truth string
+        INF_tokens: Token sets of the lowercased inference strings
+    Returns:
+        Sorted list of INF indices forming the cover
+    """
+    # Map each INF quote onto maximal runs of GT token offsets
+    spans: List[Tuple[int, int, int]] = []
+    for idx, tokens in enumerate(INF_tokens):
+        start: Optional[int] = None
+        for pos, token in enumerate(gt_tokens):
+            if token in tokens:
+                if start is None:
+                    start = pos
+            elif start is not None:
+                spans.append((start, pos, idx))
+                start = None
+        if start is not None:
+            spans.append((start, len(gt_tokens), idx))
+    spans.sort()
+
+    cover: Set[int] = set()
+    pos: int = 0
+    i: int = 0
+    while i < len(spans):
+        # Skip over positions that no span can cover
+        if spans[i][0] > pos:
+            pos = spans[i][0]
+        best_end: int = pos
+        best_idx: int = -1
+        while i < len(spans) and spans[i][0] <= pos:
+            if spans[i][1] > best_end:
+                best_end, best_idx = spans[i][1], spans[i][2]
+            i += 1
+        if best_idx >= 0:
+            cover.add(best_idx)
+            pos = best_end
+    return sorted(cover)
+
+def _span_cover_candidates(
+    gt_lower: str,
+    INF_lower: List[str]
+) -> Iterator[Iterable[Tuple[int, ...]]]:
+    """
+    Yield candidate INF combinations, an approximation of _exhaustive_candidates.
+    Pairs are enumerated exhaustively, exactly as in the exhaustive search. Instead of trying every
+    larger combination, the minimal set of INF quotes covering the GT quote is proposed together with
+    every combination obtained by swapping one of its members for another INF quote.
+    For n INF quotes and a cover of k quotes, that is n(n-1)/2 pairs plus 1 + k(n-k) proposals, so O(n^2)
+    candidates per unmatched GT quote instead of 2^n.
+    This is not a drop-in replacement for the exhaustive search: when no pair matches, only the proposed
+    combinations are tried, so TP can be lower and FP can differ. Its candidates are a subset of the
+    exhaustive ones, so it never reports more TP.
+    Args:
+        gt_lower: Lowercased ground truth string
+        INF_lower: Lowercased inference strings
+    Returns:
+        Iterator over groups of index combinations
+    """
+    yield combinations(range(len(INF_lower)), 2)
+    cover: List[int] = _greedy_span_cover(gt_lower.split(), [set(inf.split()) for inf in INF_lower])
+    if len(cover) > 2:
+        group: List[Tuple[int, ...]] = [tuple(cover)]
+        for member in cover:
+            rest: List[int] = [i for i in cover if i != member]
+            for other in range(len(INF_lower)):
+                if other not in cover:
+                    group.append(tuple(sorted(rest + [other])))
+        yield group
+
+matching_methods: Dict[str, Callable[[str, List[str]], Iterator[Iterable[Tuple[int, ...]]]]] = {
+    'exhaustive': _exhaustive_candidates,
+    'span_cover': _span_cover_candidates,
+}
+
 def matrix(
     GT: List[str],
     INF: List[str],
-    threshold: int = 90
+    threshold: int = 90,
+    method: str = 'exhaustive',
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat'
 ) -> Dict[str, int]:
     """
     Perform fuzzy matching between ground truth and inference lists.
@@ -153,12 +382,31 @@ def matrix(
         GT: Ground truth list of strings
         INF: Inference list of strings
         threshold: Minimum fuzzy match score (default: 90)
+        method: Combination search used when no single INF matches a GT string, one of
+            'exhaustive' (every combination, exact, O(2^n) in the INF quotes) or 'span_cover' (opt-in
+            approximation with O(n^2) candidates whose TP/FP/FN can differ from 'exhaustive',
+            see _span_cover_candidates) (default: 'exhaustive')
+        cache: Optional persistent score cache of the 'compat' single-quote scores; the native rapidfuzz
+            scorers bypass it (default: None)
+        backend: Single-quote scorer, 'compat' (fuzzywuzzy partial_ratio scores) or 'fast'
+            (native rapidfuzz partial_ratio) (default: 'compat')
     Returns:
         Dictionary with confusion matrix metrics: {'TP': int, 'FN': int, 'FP': int}
+    Raises:
+        ValueError: If method is not a known matching method or backend is not a known scoring backend.
     """
-    # Preprocess INF: lowercase versions and character counters
+    if method not in matching_methods:
+        raise ValueError(f"{method} is not a valid matching method, expected one of {list(matching_methods)}")
+    if backend not in scoring_backends:
+        raise ValueError(f"{backend} is not a valid scoring backend, expected one of {list(scoring_backends)}")
+    candidates = matching_methods[method]
+
+    # Preprocess INF once: lowercase versions and versions without ellipses
     INF_lower: List[str] = [inf.lower() for inf in INF]
-    INF_counters: List[Counter] = [Counter(inf) for inf in INF_lower]
+    INF_clean: List[str] = [inf.replace('...', "") for inf in INF_lower]
+    cached: Optional[np.ndarray] = None
+    if cache is not None and backend == 'compat':
+        cached = _cached_single_scores([gt.lower() for gt in GT], INF_clean, cache)
 
     grounded_matches: Set[int] = set()  # Local match candidates for this GT (used for FP tracking)
     inf_matches: Set[int] = set()
@@ -171,10 +419,13 @@ def matrix(
         matched: bool = False  # Flag to track if GT was matched
 
         # Try to match against individual INF entries
-        for idx, (inf, inf_counter) in enumerate(zip(INF_lower, INF_counters)):
+        for idx, (inf, inf_clean) in enumerate(zip(INF_lower, INF_clean)):
             # Fuzzy match score between GT and INF
             #print(f"Comparing GT: '{gt_lower}' with INF: '{inf}'")
-            fuzzy_score: int = fuzz.partial_ratio(gt_lower, inf.replace('...', ""))
+            if cached is None:
+                fuzzy_score: int = _partial_ratio(gt_lower, inf_clean, threshold, backend)
+            else:
+                fuzzy_score = cached[gt_index, idx]
             #print(fuzzy_score)
             # Subset match: all characters in GT exist in INF (by frequency)
             subset_match: bool = gt in inf
@@ -189,21 +440,18 @@ def matrix(
         # If no single INF matched, try combinations of INF entries
         if not matched:
             #print("!")
-            # Only consider INF entries not already used
-            inf_indices: List[int] = [i for i in range(len(INF))]
-
             done: bool = False
 
-            # Try combinations of unused INF entries, starting from size 2
-            for r in range(2, len(inf_indices)+1):
-                for combo in combinations(inf_indices, r):
+            # Try candidate combinations, smallest first
+            for group in candidates(gt_lower, INF_lower):
+                for combo in group:
                     # Combine text and counters of this combo
                     combined_text: str = " ".join(INF_lower[i] for i in combo)
                     combined_text_: str = "".join(INF_lower[i] for i in combo)
 
                     # Fuzzy match and subset check against the combined text
-                    fuzzy_score: int = token_set_ratio(gt_lower, combined_text)
-                    fuzzy_score_: int = token_set_ratio(gt_lower, combined_text_)
+                    fuzzy_score: int = _token_set_ratio(gt_lower, combined_text, threshold)
+                    fuzzy_score_: int = _token_set_ratio(gt_lower, combined_text_, threshold)
 
                     # If match found, mark all combo indices as used
                     if fuzzy_score >= threshold or fuzzy_score_ >= threshold or gt in combined_text_ or gt in combined_text:
@@ -220,6 +468,194 @@ def matrix(
     FN: int = len(GT) - TP
     return {'TP': TP, 'FN': FN, 'FP': FP}
 
+def score_matrices(
+    GT: List[str],
+    INF: List[str],
+    GT_lower: Optional[List[str]] = None,
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat',
+    min_threshold: int = 0
+) -> Dict[str, Any]:
+    """
+    Build the similarity matrices used by matrix, once per GT/INF pair of lists, for every threshold from
+    min_threshold up.
+    The single-quote scores are computed natively by rapidfuzz process.cdist on all cores. With the 'compat'
+    backend, that native partial_ratio bounds the compat score from above, so partial_ratio_compat only runs on
+    the pairs whose bound reaches min_threshold.
+    Args:
+        GT: Ground truth list of strings
+        INF: Inference list of strings
+        GT_lower: Lowercased GT, if already available (default: None)
+        cache: Optional persistent score cache of the 'compat' single-quote scores, see matrix (default: None)
+        backend: Single-quote scorer, see matrix (default: 'compat')
+        min_threshold: Lowest threshold the matrices will be used with; single-quote scores below it may be
+            reported as 0 (default: 0, exact scores)
+    Returns:
+        Dictionary with the lowercased inputs, the GT x INF 'single' partial ratio scores and 'subset'
+        containment flags as NumPy arrays, a 'combo' memo of combination scores filled lazily, and min_threshold
+    """
+    if GT_lower is None:
+        GT_lower = [gt.lower() for gt in GT]
+    INF_lower: List[str] = [inf.lower() for inf in INF]
+    INF_clean: List[str] = [inf.replace('...', "") for inf in INF_lower]
+    if GT and INF and backend == 'fast':
+        single: np.ndarray = process.cdist(GT_lower, INF_clean, scorer=fuzz.partial_ratio, dtype=np.float64, workers=-1, score_cutoff=min_threshold)
+    elif GT and INF:
+        bound: np.ndarray = process.cdist(
+            GT_lower, INF_clean, scorer=fuzz.partial_ratio, dtype=np.float64, workers=-1,
+            score_cutoff=max(min_threshold - 0.5 - 1e-6, 0)
+        )
+        rows, cols = np.nonzero(bound)
+        pairs: List[Tuple[str, str]] = [(GT_lower[r], INF_clean[c]) for r, c in zip(rows.tolist(), cols.tolist())]
+        single = np.zeros((len(GT), len(INF)), dtype=np.float64)
+        if pairs:
+            scorer, fn = scoring_backends['compat']
+            single[rows, cols] = [fn(*pair) for pair in pairs] if cache is None else cache.get_or_compute_many(scorer, fn, pairs)
+    else:
+        single = np.zeros((len(GT), len(INF)), dtype=np.float64)
+    subset: np.ndarray = np.array([[gt in inf for inf in INF_lower] for gt in GT], dtype=bool).reshape(len(GT), len(INF))
+    return {
+        'GT': GT,
+        'GT_lower': GT_lower,
+        'INF_lower': INF_lower,
+        'single': single,
+        'subset': subset,
+        'combo': {},
+        'min_threshold': min_threshold
+    }
+
+def matrix_from_scores(
+    scores: Dict[str, Any],
+    threshold: int = 90,
+    method: str = 'exhaustive'
+) -> Dict[str, int]:
+    """
+    Perform the matching of matrix at one threshold, reusing precomputed score matrices.
+    Combination scores are memoized in scores['combo'], so later thresholds reuse them.
+    Args:
+        scores: Output of score_matrices
+        threshold: Minimum fuzzy match score (default: 90)
+        method: Combination search, see matrix (default: 'exhaustive')
+    Returns:
+        Dictionary with confusion matrix metrics: {'TP': int, 'FN': int, 'FP': int}
+    Raises:
+        ValueError: If method is not a known matching method or threshold is below the scores' min_threshold.
+    """
+    return sweep_from_scores(scores, [threshold], method)[threshold]
+
+def sweep_from_scores(
+    scores: Dict[str, Any],
+    thresholds: List[int],
+    method: str = 'exhaustive'
+) -> Dict[int, Dict[str, int]]:
+    """
+    Perform the matching of matrix at several thresholds in one pass over the combination candidates.
+    Each GT string not matched by a single INF string walks its candidate groups once, scoring each combination
+    once, until every threshold has found its first matching group; the highest threshold sets the depth.
+    Combination scores are memoized in scores['combo'], and like the single-quote scores may be reported as 0
+    below the scores' min_threshold.
+    Args:
+        scores: Output of score_matrices
+        thresholds: Minimum fuzzy match scores to evaluate
+        method: Combination search, see matrix (default: 'exhaustive')
+    Returns:
+        Dictionary mapping each threshold to its confusion matrix metrics
+    Raises:
+        ValueError: If method is not a known matching method or a threshold is below the scores' min_threshold.
+    """
+    if method not in matching_methods:
+        raise ValueError(f"{method} is not a valid matching method, expected one of {list(matching_methods)}")
+    if thresholds and min(thresholds) < scores['min_threshold']:
+        raise ValueError(f"Threshold {min(thresholds)} is below the min_threshold {scores['min_threshold']} the scores were built for")
+    candidates = matching_methods[method]
+
+    GT: List[str] = scores['GT']
+    INF_lower: List[str] = scores['INF_lower']
+    # Threshold x GT x INF single-quote hits
+    single_hits: np.ndarray = (scores['single'][None, :, :] >= np.array(thresholds).reshape(-1, 1, 1)) | scores['subset'][None, :, :]
+    gt_hits: np.ndarray = single_hits.any(axis=2)
+    inf_hits: np.ndarray = single_hits.any(axis=1)
+    grounded_matches: Dict[int, Set[int]] = {threshold: set() for threshold in thresholds}
+    inf_matches: Dict[int, Set[int]] = {threshold: set() for threshold in thresholds}
+    for t, gt_index in zip(*np.nonzero(gt_hits)):
+        grounded_matches[thresholds[t]].add(int(gt_index))
+    for t, inf_index in zip(*np.nonzero(inf_hits)):
+        inf_matches[thresholds[t]].add(int(inf_index))
+    # GT index -> thresholds at which no single INF matches it
+    pending: Dict[int, List[int]] = {}
+    for gt_index in np.flatnonzero(~gt_hits.all(axis=0)).tolist():
+        pending[gt_index] = [threshold for t, threshold in enumerate(thresholds) if not gt_hits[t, gt_index]]
+
+    for gt_index, unmatched in pending.items():
+        gt: str = GT[gt_index]
+        gt_lower: str = scores['GT_lower'][gt_index]
+
+        for group in candidates(gt_lower, INF_lower):
+            scored: List[Tuple[Tuple[int, ...], float, bool]] = []
+            for combo in group:
+                key: Tuple[int, Tuple[int, ...]] = (gt_index, combo)
+                if key not in scores['combo']:
+                    combined_text: str = " ".join(INF_lower[i] for i in combo)
+                    combined_text_: str = "".join(INF_lower[i] for i in combo)
+                    scores['combo'][key] = (
+                        max(
+                            token_set_ratio(gt_lower, combined_text, score_cutoff=scores['min_threshold']),
+                            token_set_ratio(gt_lower, combined_text_, score_cutoff=scores['min_threshold'])
+                        ),
+                        gt in combined_text_ or gt in combined_text
+                    )
+                scored.append((combo, *scores['combo'][key]))
+
+            # Every combination of the first group with a match counts, as in matrix
+            any_subset: bool = any(subset_match for _, _, subset_match in scored)
+            best: float = max((fuzzy_score for _, fuzzy_score, _ in scored), default=-1)
+            still_unmatched: List[int] = []
+            for threshold in unmatched:
+                if not any_subset and best < threshold:
+                    still_unmatched.append(threshold)
+                    continue
+                hits = [combo for combo, fuzzy_score, subset_match in scored if fuzzy_score >= threshold or subset_match]
+                grounded_matches[threshold].add(gt_index)
+                for combo in hits:
+                    inf_matches[threshold].update(combo)
+            unmatched = still_unmatched
+            if not unmatched:
+                break
+
+    return {
+        threshold: {
+            'TP': len(grounded_matches[threshold]),
+            'FN': len(GT) - len(grounded_matches[threshold]),
+            'FP': len(INF_lower) - len(inf_matches[threshold])
+        }
+        for threshold in thresholds
+    }
+
+def matrix_sweep(
+    GT: List[str],
+    INF: List[str],
+    thresholds: List[int],
+    method: str = 'exhaustive',
+    GT_lower: Optional[List[str]] = None,
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat'
+) -> Dict[int, Dict[str, int]]:
+    """
+    Perform the fuzzy matching of matrix for several thresholds, scoring every string pair only once.
+    Args:
+        GT: Ground truth list of strings
+        INF: Inference list of strings
+        thresholds: Minimum fuzzy match scores to evaluate
+        method: Combination search, see matrix (default: 'exhaustive')
+        GT_lower: Lowercased GT, if already available (default: None)
+        cache: Optional persistent score cache (default: None)
+        backend: Single-quote scorer, see matrix (default: 'compat')
+    Returns:
+        Dictionary mapping each threshold to its confusion matrix metrics
+    """
+    scores: Dict[str, Any] = score_matrices(GT, INF, GT_lower, cache, backend, min(thresholds, default=0))
+    return sweep_from_scores(scores, thresholds, method)
+
 def calculate_f1_scores(
     confusion_list: List[Dict[str, Dict[str, int]]]
 ) -> Dict[str, Any]:
@@ -275,41 +711,268 @@ def calculate_f1_scores(
         "micro_f1": micro_f1
     }
 
+def find_human_entry(
+    human_coding_with_transcript: Any,
+    subject_code: str
+) -> Dict[str, Any]:
+    """
+    Find the human coding entry of a subject.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus (indexed lookup) or list of human-coded transcript data (linear scan)
+        subject_code: Subject code to look up
+    Returns:
+        Human coding entry of the subject
+    """
+    if hasattr(human_coding_with_transcript, 'by_subject'):
+        return human_coding_with_transcript.by_subject(subject_code)
+    return [a for a in human_coding_with_transcript if a["subject_code"] == subject_code][0]
+
+def score_subject_file(
+    pathfile: str,
+    human_entry: Dict[str, Any],
+    threshold: int = 50,
+    method: str = 'exhaustive',
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat'
+) -> Dict[str, Dict[str, int]]:
+    """
+    Read one AI output file, merge its runs and fuzzy-match every category against the human coding.
+    Args:
+        pathfile: Path to the subject's AI output JSON file
+        human_entry: Human coding entry of the same subject
+        threshold: Fuzzy match threshold (default: 50)
+        method: Combination search passed to matrix (default: 'exhaustive')
+        cache: Optional persistent score cache (default: None)
+        backend: Single-quote scorer passed to matrix (default: 'compat')
+    Returns:
+        Dictionary mapping each category to its confusion matrix metrics
+    """
+    with open(pathfile, "r", encoding="utf-8") as f:
+        inference = json.load(f)
+    ai_entry = comparison_mode(merge_multiple_ai_runs(inference))
+
+    one_entry_matrixes = {}
+
+    for acat in categories:
+        acat_human = 'Human_'+acat
+        acat_ai = 'AI_'+acat
+        one_entry_matrixes[acat] = matrix(human_entry[acat_human], ai_entry[acat_ai], threshold = threshold, method = method, cache = cache, backend = backend)
+
+    return one_entry_matrixes
+
 def calculate_f1_scores_from_path(
     human_coding_with_transcript: list,
     ai_output_path: str,
-    threshold: int = 50
+    threshold: int = 50,
+    method: str = 'exhaustive',
+    cache: Optional[ScoreCache] = None,
+    use_manifest: bool = False,
+    backend: str = 'compat'
 ) -> dict:
     """
     Calculate F1 scores from AI output files and human coding data at a given threshold.
     Args:
-        human_coding_with_transcript: List of human-coded transcript data
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
         ai_output_path: Path to directory with AI output JSON files
         threshold: Fuzzy match threshold (default: 50)
+        method: Combination search passed to matrix (default: 'exhaustive')
+        cache: Optional persistent score cache (default: None)
+        use_manifest: If True, per-subject confusion matrices are kept in a RunManifest next to the
+            run folder and only new or changed subject files are re-scored (default: False)
+        backend: Single-quote scorer passed to matrix (default: 'compat')
     Returns:
         Dictionary with per-label F1, macro F1, and micro F1
     """
+    manifest: Optional[RunManifest] = RunManifest(ai_output_path) if use_manifest else None
+    key: str = f"{method}:{backend}@{threshold}"
+    file_names = os.listdir(ai_output_path)
+
     all_matrixes = []
-    for oneJson in os.listdir(ai_output_path):
+    for oneJson in file_names:
         pathfile = f"{ai_output_path}/{oneJson}"
         if not pathfile.endswith('.json'):
             continue
 
+        try:
+            human_entry = find_human_entry(human_coding_with_transcript, oneJson.split(".")[0])
+            if manifest is None:
+                all_matrixes.append(score_subject_file(pathfile, human_entry, threshold, method, cache, backend))
+                continue
+
+            file_hash = RunManifest.file_hash(pathfile)
+            gt_hash = RunManifest.ground_truth_hash(human_entry, categories)
+            one_entry_matrixes = manifest.lookup(oneJson, file_hash, gt_hash, key)
+            if one_entry_matrixes is None:
+                one_entry_matrixes = score_subject_file(pathfile, human_entry, threshold, method, cache, backend)
+                manifest.store(oneJson, file_hash, gt_hash, key, one_entry_matrixes)
+            all_matrixes.append(one_entry_matrixes)
+        except Exception as e:
+            print(f"Error processing {oneJson}: {e}")
+
+    if cache is not None:
+        cache.flush()
+    if manifest is not None:
+        manifest.prune(file_names)
+        manifest.save()
+    return calculate_f1_scores(all_matrixes)
+
+def _score_subject_chunk(
+    tasks: List[Tuple[str, Dict[str, Any]]],
+    threshold: int,
+    method: str,
+    cache_path: Optional[str] = None,
+    cache_max_entries: int = 1_000_000,
+    backend: str = 'compat'
+) -> Tuple[List[Tuple[str, Optional[Dict[str, Dict[str, int]]], Optional[str]]], int, int, int]:
+    """
+    Score a chunk of subject files inside a worker process.
+    Args:
+        tasks: List of (file path, human entry) pairs
+        threshold: Fuzzy match threshold
+        method: Combination search passed to matrix
+        cache_path: Score cache database opened by the worker, if any (default: None)
+        cache_max_entries: Size bound of that score cache (default: 1,000,000)
+        backend: Single-quote scorer passed to matrix (default: 'compat')
+    Returns:
+        Tuple of the list of (file path, confusion matrices or None, error message or None) tuples,
+        and the worker's score cache hits, misses and evictions
+    """
+    # SQLite connections cannot be pickled, so each worker opens its own
+    cache = ScoreCache(cache_path, cache_max_entries) if cache_path else None
+    out = []
+    for pathfile, human_entry in tasks:
+        try:
+            out.append((pathfile, score_subject_file(pathfile, human_entry, threshold, method, cache, backend), None))
+        except Exception as e:
+            out.append((pathfile, None, str(e)))
+    if cache is None:
+        return out, 0, 0, 0
+    cache.close()
+    return out, cache.hits, cache.misses, cache.evictions
+
+def calculate_f1_scores_from_path_parallel(
+    human_coding_with_transcript: list,
+    ai_output_path: str,
+    threshold: int = 50,
+    method: str = 'exhaustive',
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    deterministic: bool = True,
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat'
+) -> dict:
+    """
+    Calculate F1 scores like calculate_f1_scores_from_path, spreading subject files over a process pool.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        ai_output_path: Path to directory with AI output JSON files
+        threshold: Fuzzy match threshold (default: 50)
+        method: Combination search passed to matrix (default: 'exhaustive')
+        max_workers: Number of worker processes, None for one per CPU (default: None)
+        chunksize: Number of subject files sent to a worker per task (default: 1)
+        deterministic: If True, subject files are processed and merged in sorted file name order;
+            if False, results are merged as workers finish (default: True)
+        cache: Optional persistent score cache; workers share its database file and their
+            hits, misses and evictions are added to its counters (default: None)
+        backend: Single-quote scorer passed to matrix (default: 'compat')
+    Returns:
+        Dictionary with per-label F1, macro F1, and micro F1
+    Raises:
+        ValueError: If chunksize is below 1.
+    """
+    if chunksize < 1:
+        raise ValueError(f"chunksize must be at least 1, got {chunksize}")
+    file_names = [a for a in os.listdir(ai_output_path) if a.endswith('.json')]
+    if deterministic:
+        file_names = sorted(file_names)
+
+    # Look up the human entries here so workers only receive what they score
+    tasks: List[Tuple[str, Dict[str, Any]]] = []
+    for oneJson in file_names:
+        try:
+            human_entry = find_human_entry(human_coding_with_transcript, oneJson.split(".")[0])
+            tasks.append((f"{ai_output_path}/{oneJson}", human_entry))
+        except Exception as e:
+            print(f"Error processing {oneJson}: {e}")
+
+    chunks = [tasks[i:i + chunksize] for i in range(0, len(tasks), chunksize)]
+    all_matrixes = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        if cache is not None:
+            cache.flush()
+        futures = [
+            executor.submit(_score_subject_chunk, chunk, threshold, method, cache.path if cache else None, cache.max_entries if cache else 0, backend)
+            for chunk in chunks
+        ]
+        for future in (futures if deterministic else as_completed(futures)):
+            results, hits, misses, evictions = future.result()
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
+                cache.evictions += evictions
+            for pathfile, one_entry_matrixes, error in results:
+                if error is not None:
+                    print(f"Error processing {os.path.basename(pathfile)}: {error}")
+                else:
+                    all_matrixes.append(one_entry_matrixes)
+
+    return calculate_f1_scores(all_matrixes)
+
+def calculate_f1_scores_sweep(
+    human_coding_with_transcript: list,
+    ai_output_path: str,
+    thresholds: List[int],
+    method: str = 'exhaustive',
+    exclude_subjects: Optional[Iterable[str]] = None,
+    merge_runs: bool = True,
+    cache: Optional[ScoreCache] = None,
+    backend: str = 'compat'
+) -> Dict[int, dict]:
+    """
+    Calculate F1 scores from AI output files and human coding data for several thresholds in one pass.
+    Score matrices are built once per subject and label and reused across all thresholds.
+    Args:
+        human_coding_with_transcript: HumanCodingCorpus or list of human-coded transcript data
+        ai_output_path: Path to directory with AI output JSON files
+        thresholds: Fuzzy match thresholds to evaluate
+        method: Combination search passed to matrix (default: 'exhaustive')
+        exclude_subjects: Subject codes to leave out of the evaluation (default: None)
+        merge_runs: If True, files hold lists of runs that are merged and mapped with comparison_mode;
+            if False, files already map AI label codes to quoted statements (default: True)
+        cache: Optional persistent score cache (default: None)
+        backend: Single-quote scorer passed to matrix (default: 'compat')
+    Returns:
+        Dictionary mapping each threshold to per-label F1, macro F1, and micro F1
+    """
+    excluded: Set[str] = set(exclude_subjects or [])
+    all_matrixes: Dict[int, list] = {threshold: [] for threshold in thresholds}
+    for oneJson in os.listdir(ai_output_path):
+        pathfile = f"{ai_output_path}/{oneJson}"
+        if not pathfile.endswith('.json') or oneJson.split(".")[0] in excluded:
+            continue
+
         try:
             with open(pathfile, "r", encoding="utf-8") as f:
                 inference = json.load(f)
-            ai_entry = comparison_mode(merge_multiple_ai_runs(inference))
-            human_entry = [a for a in human_coding_with_transcript if a["subject_code"] ==oneJson.split(".")[0] ][0]
+            ai_entry = comparison_mode(merge_multiple_ai_runs(inference)) if merge_runs else inference
+            subject_code = oneJson.split(".")[0]
+            human_entry = find_human_entry(human_coding_with_transcript, subject_code)
 
-            one_entry_matrixes = {}
+            one_entry_matrixes = {threshold: {} for threshold in thresholds}
 
             for acat in categories:
                 acat_human = 'Human_'+acat
                 acat_ai = 'AI_'+acat
-                one_entry_matrixes[acat] = matrix(human_entry[acat_human], ai_entry[acat_ai], threshold = threshold)
+                # A HumanCodingCorpus already holds the lowercased GT quotes
+                GT_lower = human_coding_with_transcript.gt_quotes(subject_code, acat) if hasattr(human_coding_with_transcript, 'gt_quotes') else None
+                for threshold, counts in matrix_sweep(human_entry[acat_human], ai_entry[acat_ai], thresholds, method, GT_lower, cache, backend).items():
+                    one_entry_matrixes[threshold][acat] = counts
 
-            all_matrixes.append(one_entry_matrixes)
+            for threshold in thresholds:
+                all_matrixes[threshold].append(one_entry_matrixes[threshold])
         except Exception as e:
             print(f"Error processing {oneJson}: {e}")
-        
-    return calculate_f1_scores(all_matrixes)
\ No newline at end of file
+
+    if cache is not None:
+        cache.flush()
+    return {threshold: calculate_f1_scores(all_matrixes[threshold]) for threshold in thresholds}
@@ -1,13 +1,16 @@
 import chromadb
 import json
 from src.dependencies import client
+from src.corpus import HumanCodingCorpus
+from src.telemetry import telemetry
 import asyncio
+import time
 
-def create_collection_codings(human_coding_with_transcript: list[dict]) -> object:
+def create_collection_codings(human_coding_with_transcript: HumanCodingCorpus | list[dict]) -> object:
     """
     Create a ChromaDB collection from human coding data with embeddings and metadata.
     Args:
-        human_coding_with_transcript: List of dictionaries with transcript and coding info.
+        human_coding_with_transcript: HumanCodingCorpus or list of dictionaries with transcript and coding info.
     Returns:
         ChromaDB collection object.
     """
@@ -56,32 +59,38 @@ def create_collection_codings(human_coding_with_transcript: list[dict]) -> objec
 with open("data/human_coding/human_coding_with_transcript.json", "r", encoding="utf-8") as f:
     data = json.load(f)
 for one_entry in data:
+    start = time.perf_counter()
     emb = client.embeddings.create(
     model="text-embedding-ada-002",
     input=one_entry['transcript'],
     encoding_format="float"
     )
+    telemetry.record(
+        "embedding", "text-embedding-ada-002", time.perf_counter() - start,
+        subject=one_entry['subject_code'], step='embedding',
+        prompt_tokens=getattr(emb.usage, "prompt_tokens", 0) or 0
+    )
     one_entry['embeddings'] = emb.data[0].embedding
 with open("data/human_coding/human_coding_with_transcript_with_embeddings.json", "w", encoding="utf-8") as f:
     json.dump(data, f, indent=2, ensure_ascii=False)
 
 # read embeddings from file and create chromadb collection
-with open("data/human_coding/human_coding_with_transcript_with_embeddings.json", "r", encoding="utf-8") as f:
-    human_coding_with_transcript = json.load(f)
+human_coding_with_transcript = HumanCodingCorpus.from_json("data/human_coding/human_coding_with_transcript_with_embeddings.json")
 
 reference_collection = create_collection_codings(human_coding_with_transcript)
 
-def get_closest_3(id: str, topic: str, top_n: int = 3) -> str:
+def get_closest_3(id: str, topic: str, top_n: int = 3, corpus: HumanCodingCorpus | None = None) -> str:
     """
     Retrieve the top_n most similar transcripts by embedding for a given id and topic.
     Args:
         id: Subject code to match.
         topic: Coding topic to retrieve examples for.
         top_n: Number of examples to return (default: 3).
+        corpus: Corpus holding the embeddings, defaults to the one loaded by this module.
     Returns:
         String containing formatted reference examples for prompting.
     """
-    current_embedding = [a for a in human_coding_with_transcript if a['subject_code'] == id][0]['embeddings']
+    current_embedding = (corpus or human_coding_with_transcript).by_subject(id)['embeddings']
 
     results = reference_collection.query(
         query_embeddings=[current_embedding],
@@ -0,0 +1,33 @@
+import sqlite3
+
+from src.completion_cache import CompletionCache
+
+REQUEST = {"model": "m", "messages": [{"role": "user", "content": "ping"}]}
+
+
+def test_get_does_not_hold_the_write_lock(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    cache = CompletionCache(path)
+    cache.put(REQUEST, "pong")
+    assert cache.get(REQUEST) == "pong"
+
+    other = sqlite3.connect(path, timeout=0)
+    other.execute("BEGIN IMMEDIATE")
+    other.rollback()
+    other.close()
+    cache.close()
+
+
+def test_recency_is_recorded_on_close(tmp_path) -> None:
+    path = str(tmp_path / "cache.sqlite")
+    cache = CompletionCache(path)
+    cache.put(REQUEST, "run 0", sample=0)
+    cache.put(REQUEST, "run 1", sample=1)
+    assert cache.get(REQUEST, sample=0) == "run 0"
+    cache.close()
+
+    reopened = CompletionCache(path, max_entries=1)
+    reopened.evict()
+    assert reopened.get(REQUEST, sample=0) == "run 0"
+    assert reopened.get(REQUEST, sample=1) is None
+    reopened.close()
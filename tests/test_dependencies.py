@@ -0,0 +1,47 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import threading
+import json
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+from src.dependencies import async_client, build_async_http_client
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = json.dumps({
+            "id": "chatcmpl-smoke",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "smoke-model",
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "pong"}}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: object) -> None:
+        pass
+
+
+def test_async_client_sends_a_real_request() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client = async_client.with_options(base_url=f"http://127.0.0.1:{server.server_port}/v1")
+        response = asyncio.run(client.chat.completions.create(model="smoke-model", messages=[{"role": "user", "content": "ping"}]))
+    finally:
+        server.shutdown()
+    assert response.choices[0].message.content == "pong"
+
+
+def test_http_client_reads_timeouts_from_environment(monkeypatch) -> None:
+    monkeypatch.setenv("OPENAI_TIMEOUT", "42")
+    monkeypatch.setenv("OPENAI_CONNECT_TIMEOUT", "3")
+    timeout = build_async_http_client().timeout
+    assert (timeout.read, timeout.connect) == (42.0, 3.0)
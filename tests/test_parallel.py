@@ -0,0 +1,27 @@
+import pytest
+
+from src.score_cache import ScoreCache
+from src.synthetic import generate_corpus, write_corpus
+from src.utils import calculate_f1_scores_from_path, calculate_f1_scores_from_path_parallel
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = generate_corpus(n_subjects=6, seed=3)
+    return corpus["human_coding"], write_corpus(corpus, str(tmp_path))["ai_output_path"]
+
+
+def test_parallel_rejects_empty_chunks(corpus) -> None:
+    human_coding, path = corpus
+    with pytest.raises(ValueError):
+        calculate_f1_scores_from_path_parallel(human_coding, path, chunksize=0)
+
+
+def test_parallel_matches_serial_and_counts_worker_evictions(corpus, tmp_path) -> None:
+    human_coding, path = corpus
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"), max_entries=5)
+    scores = calculate_f1_scores_from_path_parallel(human_coding, path, max_workers=2, chunksize=2, cache=cache)
+    assert scores == calculate_f1_scores_from_path(human_coding, path)
+    assert cache.misses > 0
+    assert cache.evictions > 0
+    cache.close()
@@ -0,0 +1,65 @@
+import json
+import os
+import random
+
+import pytest
+
+from src.utils import categories, find_human_entry, matrix, score_subject_file
+
+# Share of the human-coded category matrices on which the span_cover approximation may differ from the exhaustive search
+MAX_DIVERGENCE = 0.05
+
+HUMAN_CODING = os.path.join("data", "human_coding", "human_coding_with_transcript.json")
+AI_OUTPUT = "ai_json_output"
+
+WORDS = "i was sad because of work at home with my family and the job felt very hard so we lost money".split()
+
+
+def random_quote(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 12)))
+
+
+def test_span_cover_never_credits_more_than_exhaustive() -> None:
+    rng = random.Random(7)
+    differing = 0
+    cases = 2000
+    for _ in range(cases):
+        gt = [random_quote(rng) for _ in range(rng.randint(1, 4))]
+        inf = [random_quote(rng) for _ in range(rng.randint(0, 7))]
+        exact = matrix(gt, inf, 90, 'exhaustive')
+        approximate = matrix(gt, inf, 90, 'span_cover')
+        # span_cover tries a subset of the exhaustive combinations
+        assert approximate['TP'] <= exact['TP']
+        differing += approximate != exact
+    # Random quotes over a small vocabulary overlap far more than real ones, so only the real data is held to a bound
+    print(f"span_cover differs from exhaustive on {differing}/{cases} random cases")
+
+
+def test_span_cover_divergence_on_human_coding() -> None:
+    if not os.path.exists(HUMAN_CODING):
+        pytest.skip(f"{HUMAN_CODING} not available, obtain it from the author")
+    with open(HUMAN_CODING, "r", encoding="utf-8") as f:
+        human_coding = json.load(f)
+
+    compared = 0
+    differing = 0
+    for run in sorted(os.listdir(AI_OUTPUT)):
+        folder = os.path.join(AI_OUTPUT, run)
+        if not os.path.isdir(folder):
+            continue
+        for file_name in sorted(os.listdir(folder)):
+            if not file_name.endswith(".json"):
+                continue
+            try:
+                human_entry = find_human_entry(human_coding, file_name.split(".")[0])
+            except IndexError:
+                continue
+            path = os.path.join(folder, file_name)
+            exact = score_subject_file(path, human_entry, 50, 'exhaustive')
+            approximate = score_subject_file(path, human_entry, 50, 'span_cover')
+            compared += len(categories)
+            differing += sum(approximate[acat] != exact[acat] for acat in categories)
+    if not compared:
+        pytest.skip(f"No AI outputs of human-coded subjects in {AI_OUTPUT}")
+    print(f"span_cover differs from exhaustive on {differing}/{compared} category matrices")
+    assert differing / compared <= MAX_DIVERGENCE